@@ -0,0 +1,134 @@
+"""
+Phrase banks for local fallback horoscopes.
+
+- Тексты собираются из нескольких банков: вступление, сфера дня, совет и итог
+- Для каждого знака есть своё вступление в духе его стихии
+- Для прогноза на неделю - свои вступления и подписи совета, цвета и числа
+- Тексты используются сервисом fallback_service
+"""
+
+from typing import Dict, List
+from app.data.signs import SIGNS
+
+# ==================================================
+# ВСТУПЛЕНИЕ ПО СТИХИЯМ
+# ==================================================
+
+# Стихия по русскому названию знака (из единого справочника app/data/signs.py)
+ELEMENT_OF_SIGN: Dict[str, str] = {data["ru"]: data["element"] for data in SIGNS.values()}
+
+OPENINGS: Dict[str, List[str]] = {
+    "fire": [
+        "Сегодня звезды благоволят к новым начинаниям.",
+        "Ваша энергия сегодня заразительна - окружающие потянутся к вам.",
+        "День подходит для смелых решений и быстрых действий.",
+        "Внутренний огонь подскажет, куда направить силы.",
+        "Сегодня легко зажечь других своими идеями.",
+    ],
+    "earth": [
+        "День идеален для планирования будущего.",
+        "Сегодня особенно ценны порядок и последовательность.",
+        "Звезды поддерживают практичный подход ко всему.",
+        "Хорошее время, чтобы укрепить то, что уже построено.",
+        "Спокойный темп сегодня принесёт больше, чем спешка.",
+    ],
+    "air": [
+        "Сегодняшний день принесет приятные сюрпризы.",
+        "День благоприятен для общения и новых знакомств.",
+        "Свежие идеи сегодня приходят неожиданно - записывайте их.",
+        "Звезды советуют проявить терпение в общении.",
+        "Сегодня легко найти общий язык даже с трудным собеседником.",
+    ],
+    "water": [
+        "Слушайте свою интуицию - она не подведет.",
+        "Сегодня вы особенно чутко замечаете настроение окружающих.",
+        "День располагает к искренним разговорам.",
+        "Эмоции сегодня - хороший компас, доверьтесь им.",
+        "Звезды советуют беречь силы и не брать на себя чужие заботы.",
+    ],
+}
+
+WEEK_OPENINGS: Dict[str, List[str]] = {
+    "fire": [
+        "Эта неделя благоволит к новым начинаниям.",
+        "На этой неделе ваша энергия заразительна - окружающие потянутся к вам.",
+        "Неделя подходит для смелых решений и быстрых действий.",
+        "Внутренний огонь всю неделю подскажет, куда направить силы.",
+        "На этой неделе легко зажечь других своими идеями.",
+    ],
+    "earth": [
+        "Неделя идеальна для планирования будущего.",
+        "На этой неделе особенно ценны порядок и последовательность.",
+        "Всю неделю звезды поддерживают практичный подход.",
+        "Хорошая неделя, чтобы укрепить то, что уже построено.",
+        "Спокойный темп на этой неделе принесёт больше, чем спешка.",
+    ],
+    "air": [
+        "Эта неделя принесёт приятные сюрпризы.",
+        "Неделя благоприятна для общения и новых знакомств.",
+        "Свежие идеи на этой неделе приходят неожиданно - записывайте их.",
+        "Всю неделю звезды советуют проявлять терпение в общении.",
+        "На этой неделе легко найти общий язык даже с трудным собеседником.",
+    ],
+    "water": [
+        "Всю неделю слушайте свою интуицию - она не подведёт.",
+        "На этой неделе вы особенно чутко замечаете настроение окружающих.",
+        "Неделя располагает к искренним разговорам.",
+        "Эмоции на этой неделе - хороший компас, доверьтесь им.",
+        "Звезды советуют всю неделю беречь силы и не брать на себя чужие заботы.",
+    ],
+}
+
+# ==================================================
+# СФЕРЫ (подходят и для дня, и для недели)
+# ==================================================
+
+LOVE: List[str] = [
+    "В отношениях ценнее всего внимание к мелочам.",
+    "Вы особенно привлекательны для окружающих.",
+    "Близкие оценят тёплое слово, сказанное вовремя.",
+    "Одинокие знаки могут встретить интересного человека.",
+    "Не торопите события в личной жизни - всё идёт своим чередом.",
+    "Совместные планы сегодня сближают сильнее любых слов.",
+]
+
+WORK: List[str] = [
+    "Хорошее время для завершения старых дел.",
+    "Финансовые вопросы требуют особого внимания.",
+    "На работе ваше мнение будет услышано.",
+    "Не бойтесь делать первый шаг в важных вопросах.",
+    "Полезно разобрать накопившиеся задачи.",
+    "Крупные покупки лучше отложить на пару дней.",
+]
+
+HEALTH: List[str] = [
+    "Уделите время саморазвитию и обучению.",
+    "Прогулка на свежем воздухе вернёт ясность мыслей.",
+    "Постарайтесь лечь спать пораньше - организм скажет спасибо.",
+    "Лёгкая физическая нагрузка поднимет настроение.",
+    "Не забывайте делать паузы в течение дня.",
+]
+
+# ==================================================
+# СОВЕТ И ИТОГ
+# ==================================================
+
+ADVICE: List[str] = [
+    "доверяйте первому впечатлению.",
+    "начните с самого трудного дела.",
+    "скажите «нет» тому, что отнимает силы.",
+    "поблагодарите того, кто вам помог.",
+    "оставьте вечер для себя.",
+    "запишите три цели на неделю.",
+]
+
+LUCKY_COLORS: List[str] = [
+    "красный", "оранжевый", "жёлтый", "зелёный", "голубой",
+    "синий", "фиолетовый", "белый", "серебристый", "золотой",
+]
+
+# Подписи совета, цвета и числа: для прогноза на день и на неделю
+PERIOD_LABELS: Dict[str, Dict[str, str]] = {
+    "day": {"advice": "Совет дня", "color": "Цвет дня", "number": "число дня"},
+    "week": {"advice": "Совет недели", "color": "Цвет недели", "number": "число недели"},
+}
@@ -47,6 +47,58 @@ def init_database():
             )
         ''')
 
+        # Таблица полученных гороскопов (общая для перезапусков и реплик)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS horoscopes (
+                sign TEXT NOT NULL,
+                date TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                source TEXT NOT NULL,
+                text TEXT NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (sign, date, lang, source)
+            )
+        ''')
+
+        # Таблица учёта запросов к платным API (по хэшу ключа и периоду: день или месяц)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_usage (
+                key_hash TEXT NOT NULL,
+                period TEXT NOT NULL,
+                requests INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (key_hash, period)
+            )
+        ''')
+
+        # Таблица памяти переводов (ключ - хэш исходного текста и пара языков)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (text_hash, source_lang, target_lang)
+            )
+        ''')
+
+        # Очередь доставки рассылки: одна строка на пользователя и день (pending / sent / failed / blocked)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS deliveries (
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                sent_at TIMESTAMP,
+                PRIMARY KEY (user_id, date)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_deliveries_pending ON deliveries (date, status, slot)
+        ''')
+
         conn.commit()
         conn.close()
         logger.success("[DB] Database initialized successfully")
@@ -118,6 +170,52 @@ def create_user(user_id: int, username: Optional[str], first_name: Optional[str]
         logger.error(f"[DB_ERROR] create_user: {e}")
 
 
+def deactivate_users(user_ids: List[int]) -> int:
+    """
+    Помечает пользователей неактивными (заблокировали бота или удалили аккаунт).
+
+    Неактивные не попадают в рассылку; /start снова делает пользователя активным.
+    """
+    if not user_ids:
+        return 0
+
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.executemany(
+            'UPDATE users SET is_active = 0 WHERE id = ? AND is_active = 1',
+            [(user_id,) for user_id in user_ids]
+        )
+        updated = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        logger.info(f"[DB] Users deactivated: {updated}")
+        return updated
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] deactivate_users: {e}")
+        return 0
+
+
+def count_inactive_users() -> int:
+    """Считает пользователей, помеченных неактивными"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('SELECT COUNT(*) AS total FROM users WHERE is_active = 0')
+        total = cursor.fetchone()['total']
+        conn.close()
+
+        return total
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] count_inactive_users: {e}")
+        return 0
+
+
 def update_user_sign(user_id: int, sign: str) -> None:
     """Обновляет знак зодиака пользователя"""
     try:
@@ -214,6 +312,7 @@ def get_subscribed_users_for_time(target_time: str) -> List[Dict]:
             FROM users u
             JOIN subscriptions s ON u.id = s.user_id
             WHERE s.is_subscribed = 1 
+            AND u.is_active = 1
             AND u.sign IS NOT NULL
             AND u.sign != ''
             AND s.notification_time = ?
@@ -239,5 +338,390 @@ def get_subscribed_users_for_time(target_time: str) -> List[Dict]:
         return []
 
 
+
+def get_active_notification_times() -> List[str]:
+    """Получает отсортированный список времён рассылки, на которые есть подписчики"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT DISTINCT s.notification_time
+            FROM subscriptions s
+            JOIN users u ON u.id = s.user_id
+            WHERE s.is_subscribed = 1
+            AND u.is_active = 1
+            AND u.sign IS NOT NULL
+            AND u.sign != ''
+            ORDER BY s.notification_time
+        ''')
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [row['notification_time'] for row in rows]
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_active_notification_times: {e}")
+        return []
+
+
+# ===================== HOROSCOPES =====================
+
+def get_horoscope(sign: str, date: str, lang: str, source: Optional[str] = None) -> Optional[Dict]:
+    """
+    Получает последний сохранённый гороскоп знака на указанную дату.
+
+    Без source возвращаются только гороскопы от API: заранее сохранённые
+    резервные тексты (source = 'fallback') не должны заменять ответ API.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        if source:
+            source_filter, params = "source = ?", (sign.lower(), date, lang, source)
+        else:
+            source_filter, params = "source != 'fallback'", (sign.lower(), date, lang)
+
+        cursor.execute(f'''
+            SELECT sign, date, lang, source, text, fetched_at
+            FROM horoscopes
+            WHERE sign = ? AND date = ? AND lang = ? AND {source_filter}
+            ORDER BY fetched_at DESC
+            LIMIT 1
+        ''', params)
+
+        row = cursor.fetchone()
+        conn.close()
+
+        if row:
+            return dict(row)
+        return None
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_horoscope: {e}")
+        return None
+
+
+def save_horoscope(sign: str, date: str, lang: str, source: str, text: str) -> None:
+    """Сохраняет (или перезаписывает) гороскоп знака на указанную дату"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''INSERT OR REPLACE INTO horoscopes (sign, date, lang, source, text, fetched_at)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            (sign.lower(), date, lang, source, text, datetime.now().isoformat())
+        )
+        conn.commit()
+        conn.close()
+
+        logger.debug(f"[DB] Horoscope saved: {sign} {date} {lang} ({source})")
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] save_horoscope: {e}")
+
+
+def save_horoscopes(rows: List[tuple]) -> None:
+    """Сохраняет пачку гороскопов (sign, date, lang, source, text) одной транзакцией"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        now = datetime.now().isoformat()
+        cursor.executemany(
+            '''INSERT OR REPLACE INTO horoscopes (sign, date, lang, source, text, fetched_at)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            [(sign.lower(), date, lang, source, text, now) for sign, date, lang, source, text in rows]
+        )
+        conn.commit()
+        conn.close()
+
+        logger.debug(f"[DB] Horoscopes saved: {len(rows)}")
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] save_horoscopes: {e}")
+
+
+def get_horoscope_keys(source: str, lang: str, date_from: str, date_to: str) -> set:
+    """Получает пары (знак, дата) сохранённых гороскопов источника за период"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT sign, date FROM horoscopes
+            WHERE source = ? AND lang = ? AND date BETWEEN ? AND ?
+        ''', (source, lang, date_from, date_to))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return {(row['sign'], row['date']) for row in rows}
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_horoscope_keys: {e}")
+        return set()
+
+
+
+# ===================== API USAGE =====================
+
+def increment_api_usage(key_hash: str, periods: List[str]) -> None:
+    """Увеличивает счётчики запросов ключа API за указанные периоды (день, месяц)"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        now = datetime.now().isoformat()
+        for period in periods:
+            cursor.execute(
+                '''INSERT INTO api_usage (key_hash, period, requests, updated_at)
+                   VALUES (?, ?, 1, ?)
+                   ON CONFLICT(key_hash, period)
+                   DO UPDATE SET requests = requests + 1, updated_at = excluded.updated_at''',
+                (key_hash, period, now)
+            )
+
+        conn.commit()
+        conn.close()
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] increment_api_usage: {e}")
+
+
+def get_api_usage(key_hash: str, periods: List[str]) -> Dict[str, int]:
+    """Получает счётчики запросов ключа API за указанные периоды"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        placeholders = ", ".join("?" for _ in periods)
+        cursor.execute(
+            f'''SELECT period, requests FROM api_usage
+                WHERE key_hash = ? AND period IN ({placeholders})''',
+            (key_hash, *periods)
+        )
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        usage = {period: 0 for period in periods}
+        usage.update({row['period']: row['requests'] for row in rows})
+        return usage
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_api_usage: {e}")
+        return {period: 0 for period in periods}
+
+
+# ===================== TRANSLATIONS =====================
+
+def get_translation(text_hash: str, source_lang: str, target_lang: str) -> Optional[str]:
+    """Получает сохранённый перевод по хэшу исходного текста"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''SELECT translated FROM translations
+               WHERE text_hash = ? AND source_lang = ? AND target_lang = ?''',
+            (text_hash, source_lang, target_lang)
+        )
+
+        row = cursor.fetchone()
+        conn.close()
+
+        return row['translated'] if row else None
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_translation: {e}")
+        return None
+
+
+def save_translation(text_hash: str, source_lang: str, target_lang: str, translated: str) -> None:
+    """Сохраняет перевод в память переводов"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            '''INSERT OR REPLACE INTO translations
+               (text_hash, source_lang, target_lang, translated, created_at)
+               VALUES (?, ?, ?, ?, ?)''',
+            (text_hash, source_lang, target_lang, translated, datetime.now().isoformat())
+        )
+        conn.commit()
+        conn.close()
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] save_translation: {e}")
+
+
+def delete_old_translations(older_than: str) -> int:
+    """Удаляет переводы, сохранённые раньше указанного момента (ISO). Возвращает число удалённых"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('DELETE FROM translations WHERE created_at < ?', (older_than,))
+        deleted = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+
+        if deleted:
+            logger.info(f"[DB] Old translations deleted: {deleted}")
+        return deleted
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] delete_old_translations: {e}")
+        return 0
+
+
+# ===================== DELIVERIES =====================
+
+def create_deliveries(date: str, slot: str, user_ids: List[int]) -> int:
+    """
+    Добавляет пользователей слота в очередь доставки.
+
+    Пользователь, уже стоящий в очереди на эту дату (в любом статусе),
+    повторно не добавляется - так каждый получает не больше одной рассылки в день.
+    """
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.executemany(
+            '''INSERT OR IGNORE INTO deliveries (user_id, date, slot, status)
+               VALUES (?, ?, ?, 'pending')''',
+            [(user_id, date, slot) for user_id in user_ids]
+        )
+        created = cursor.rowcount
+        conn.commit()
+        conn.close()
+
+        return created
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] create_deliveries: {e}")
+        return 0
+
+
+def get_pending_deliveries(date: str, slot: str) -> List[Dict]:
+    """Получает недоставленных активных пользователей слота с данными для сообщения"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT u.id, u.first_name, u.sign, d.slot
+            FROM deliveries d
+            JOIN users u ON u.id = d.user_id
+            WHERE d.date = ? AND d.slot = ? AND d.status = 'pending'
+            AND u.is_active = 1
+            AND u.sign IS NOT NULL
+            AND u.sign != ''
+        ''', (date, slot))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [dict(row) for row in rows]
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_pending_deliveries: {e}")
+        return []
+
+
+def get_pending_delivery_slots(date: str, until_slot: str) -> List[str]:
+    """Получает слоты даты (не позже until_slot), в которых остались недоставленные сообщения"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT DISTINCT slot FROM deliveries
+            WHERE date = ? AND status = 'pending' AND slot <= ?
+            ORDER BY slot
+        ''', (date, until_slot))
+
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [row['slot'] for row in rows]
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] get_pending_delivery_slots: {e}")
+        return []
+
+
+def update_delivery_statuses(date: str, results: List[tuple]) -> None:
+    """Записывает результаты доставки (user_id, status) одной транзакцией"""
+    if not results:
+        return
+
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        now = datetime.now().isoformat()
+        cursor.executemany(
+            '''UPDATE deliveries
+               SET status = ?, attempts = attempts + 1,
+                   sent_at = CASE WHEN ? = 'sent' THEN ? ELSE sent_at END
+               WHERE user_id = ? AND date = ?''',
+            [(status, status, now, user_id, date) for user_id, status in results]
+        )
+        conn.commit()
+        conn.close()
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] update_delivery_statuses: {e}")
+
+
+def count_deliveries(date: str) -> Dict[str, int]:
+    """Считает строки очереди доставки за дату по статусам"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute(
+            'SELECT status, COUNT(*) AS total FROM deliveries WHERE date = ? GROUP BY status',
+            (date,)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return {row['status']: row['total'] for row in rows}
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] count_deliveries: {e}")
+        return {}
+
+
+def delete_old_deliveries(older_than: str) -> int:
+    """Удаляет строки очереди доставки с датой раньше указанной (ISO). Возвращает число удалённых"""
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('DELETE FROM deliveries WHERE date < ?', (older_than,))
+        deleted = cursor.rowcount
+
+        conn.commit()
+        conn.close()
+
+        if deleted:
+            logger.info(f"[DB] Old deliveries deleted: {deleted}")
+        return deleted
+
+    except Exception as e:
+        logger.error(f"[DB_ERROR] delete_old_deliveries: {e}")
+        return 0
+
+
 # Инициализируем базу данных при импорте
 init_database()
\ No newline at end of file
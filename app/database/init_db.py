@@ -17,7 +17,7 @@ def recreate_database() -> None:
 
     Выполняет:
     1. Удаление существующей базы данных (если есть)
-    2. Создание новых таблиц users и subscriptions
+    2. Создание новых таблиц users, subscriptions, horoscopes, translations, api_usage и deliveries
     3. Проверку созданной структуры
 
     Предназначена для инициализации или сброса БД при разработке.
@@ -58,6 +58,62 @@ def recreate_database() -> None:
             )
         ''')
 
+        # 3. Таблица гороскопов
+        # Хранит полученные и переведённые тексты, чтобы не запрашивать их повторно
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS horoscopes (
+                sign TEXT NOT NULL,
+                date TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                source TEXT NOT NULL,
+                text TEXT NOT NULL,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (sign, date, lang, source)
+            )
+        ''')
+
+        # 4. Таблица памяти переводов
+        # Хранит переводы по хэшу исходного текста, чтобы не переводить его повторно
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                text_hash TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (text_hash, source_lang, target_lang)
+            )
+        ''')
+
+        # 5. Таблица учёта запросов к платным API
+        # Хранит число запросов по хэшу ключа за день и за месяц (для бюджета квоты)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS api_usage (
+                key_hash TEXT NOT NULL,
+                period TEXT NOT NULL,
+                requests INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (key_hash, period)
+            )
+        ''')
+
+        # 6. Очередь доставки рассылки
+        # Одна строка на пользователя и день: статус доставки переживает перезапуск бота
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS deliveries (
+                user_id INTEGER NOT NULL,
+                date TEXT NOT NULL,
+                slot TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                sent_at TIMESTAMP,
+                PRIMARY KEY (user_id, date)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_deliveries_pending ON deliveries (date, status, slot)
+        ''')
+
         # Фиксируем изменения и закрываем соединение
         conn.commit()
         conn.close()
@@ -76,7 +132,7 @@ def check_database_structure() -> None:
     """
     Проверяет структуру таблиц в базе данных.
 
-    Выводит в лог список колонок для таблиц users и subscriptions
+    Выводит в лог список колонок для таблиц users, subscriptions, horoscopes, translations, api_usage и deliveries
     для подтверждения корректного создания.
     """
     try:
@@ -93,6 +149,26 @@ def check_database_structure() -> None:
         subs_columns: List[tuple] = cursor.fetchall()
         logger.info(f"[DB] Колонки таблицы subscriptions: {[col[1] for col in subs_columns]}")
 
+        # Проверяем структуру таблицы horoscopes
+        cursor.execute("PRAGMA table_info(horoscopes)")
+        horoscopes_columns: List[tuple] = cursor.fetchall()
+        logger.info(f"[DB] Колонки таблицы horoscopes: {[col[1] for col in horoscopes_columns]}")
+
+        # Проверяем структуру таблицы translations
+        cursor.execute("PRAGMA table_info(translations)")
+        translations_columns: List[tuple] = cursor.fetchall()
+        logger.info(f"[DB] Колонки таблицы translations: {[col[1] for col in translations_columns]}")
+
+        # Проверяем структуру таблицы api_usage
+        cursor.execute("PRAGMA table_info(api_usage)")
+        usage_columns: List[tuple] = cursor.fetchall()
+        logger.info(f"[DB] Колонки таблицы api_usage: {[col[1] for col in usage_columns]}")
+
+        # Проверяем структуру таблицы deliveries
+        cursor.execute("PRAGMA table_info(deliveries)")
+        deliveries_columns: List[tuple] = cursor.fetchall()
+        logger.info(f"[DB] Колонки таблицы deliveries: {[col[1] for col in deliveries_columns]}")
+
         conn.close()
 
     except Exception as e:
@@ -2,9 +2,15 @@
 # Обработчики административной панели для администраторов бота
 # Доступны только пользователям из списка ADMIN_IDS
 
+from datetime import date
 from aiogram import Router, F
 from aiogram.types import Message
 from aiogram.filters import Command
+from app.database.crud import count_deliveries, count_inactive_users
+from app.services.delivery_service import DeliveryService
+from app.services.horoscope_api import HoroscopeAPI, horoscope_cache
+from app.services.scheduler_service import SchedulerService
+from app.services.translator_service import SimpleTranslator, translation_memory
 from app.utils.logger import logger
 
 # Создаем роутер для административных команд
@@ -53,5 +59,192 @@ async def admin_panel(message: Message):
         "/stats - Статистика бота\n"
         "/users - Список пользователей\n"
         "/broadcast - Рассылка сообщений\n"
-        "/logs - Последние логи"
+        "/logs - Последние логи\n"
+        "/providers - Состояние источников гороскопов и хеджирование\n"
+        "/metrics - Задержки по этапам, исходы запросов, кэши и пул соединений\n"
+        "/delivery - Статистика рассылок, прогрев кэша и отключённые пользователи"
     )
+
+
+@router.message(Command("providers"))
+async def providers_status(message: Message):
+    """
+    Показывает состояние источников гороскопов при команде /providers.
+
+    Источники выводятся в текущем порядке маршрутизации: состояние
+    предохранителя (closed / open / half_open), успешность, задержка,
+    расход и остаток дневного и месячного бюджета, кэш сбоев и адаптивные таймауты.
+    Ниже - статистика хеджирования: число гонок, победы и отмены каждого
+    источника, его задержка хеджирования и p95 задержки ответа.
+
+    Args:
+        message (Message): Входящее сообщение с командой /providers
+    """
+    if not check_admin(message.from_user.id):
+        await message.answer("⛔ У вас нет прав администратора")
+        logger.warning(f"[ADMIN] Попытка доступа без прав: {message.from_user.id}")
+        return
+
+    logger.info(f"[ADMIN_PROVIDERS] {message.from_user.id}")
+
+    state_emoji = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+    lines = ["📡 *Источники гороскопов* (в порядке опроса)\n"]
+
+    for rank, (name, status) in enumerate(HoroscopeAPI.provider_status().items(), start=1):
+        budget_day = status["budget_day"] if status["budget_day"] is not None else "∞"
+        budget_month = status["budget_month"] if status["budget_month"] is not None else "∞"
+        remaining_day = status["remaining_day"] if status["remaining_day"] is not None else "∞"
+        remaining_month = status["remaining_month"] if status["remaining_month"] is not None else "∞"
+        lines.append(
+            f"{rank}. {state_emoji.get(status['state'], '⚪')} *{name}*: `{status['state']}`\n"
+            f"   успешность: `{status['success_rate']}`, p50: `{status['p50']}s`, score: `{status['score']}`\n"
+            f"   сбоев подряд: `{status['failures']}`, открывался: `{status['times_opened']}`\n"
+            f"   отклонено: `{status['rejected']}`, повтор через: `{status['retry_in']}s`\n"
+            f"   запросов за день: `{status['usage_day']}` из `{budget_day}` (осталось `{remaining_day}`)\n"
+            f"   запросов за месяц: `{status['usage_month']}` из `{budget_month}` (осталось `{remaining_month}`)\n"
+            f"   стоимость: `{status['cost']}`, бюджет сберегается: `{status['budget_saving']}`\n"
+            f"   знаков в кэше сбоев: `{status['negative_cached']}`\n"
+            f"   таймауты: connect `{status['connect_timeout']}s`, read `{status['read_timeout']}s`"
+        )
+
+    if len(lines) == 1:
+        lines.append("Нет настроенных источников")
+
+    hedge = HoroscopeAPI.hedge_stats()
+    lines.append(f"\n🏁 *Хеджирование* (гонок: `{hedge['races']}`)")
+    for name in HoroscopeAPI.provider_status():
+        p95 = hedge[f"{name}_latency"]["p95"]
+        p95_text = f"{round(p95, 3)}s" if p95 is not None else "-"
+        lines.append(
+            f"*{name}*: побед `{hedge.get(f'{name}_wins', 0)}` (доля `{hedge[f'{name}_win_rate']}`), "
+            f"отменено `{hedge.get(f'{name}_cancelled', 0)}`, "
+            f"задержка хеджирования `{hedge[f'{name}_hedge_delay']}s`, "
+            f"p95 `{p95_text}`"
+        )
+
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("metrics"))
+async def metrics_status(message: Message):
+    """
+    Показывает гистограммы задержек по этапам и счётчики исходов при команде /metrics.
+
+    Для каждого этапа (dns, connect, response, decode, translate, format, total)
+    выводятся количество замеров, среднее, p50/p95/p99 и максимум в секундах.
+    Ниже - переиспользование соединений HTTP-пула, кэш гороскопов, очередь
+    пула перевода и память переводов.
+
+    Args:
+        message (Message): Входящее сообщение с командой /metrics
+    """
+    if not check_admin(message.from_user.id):
+        await message.answer("⛔ У вас нет прав администратора")
+        logger.warning(f"[ADMIN] Попытка доступа без прав: {message.from_user.id}")
+        return
+
+    logger.info(f"[ADMIN_METRICS] {message.from_user.id}")
+
+    snapshot = HoroscopeAPI.stage_stats()
+    order = ["dns", "connect", "response", "decode", "translate", "format", "total"]
+    stages = sorted(snapshot["stages"], key=lambda stage: order.index(stage) if stage in order else len(order))
+
+    lines = ["⏱ *Задержки по этапам* (сек)\n"]
+    for stage in stages:
+        summary = snapshot["stages"][stage]
+        lines.append(
+            f"*{stage}*: n=`{summary['count']}`, avg `{summary['avg']}`, "
+            f"p50 `{summary['p50']}`, p95 `{summary['p95']}`, p99 `{summary['p99']}`, max `{summary['max']}`"
+        )
+
+    if len(lines) == 1:
+        lines.append("Замеров пока нет")
+
+    outcomes = snapshot["outcomes"]
+    lines.append("\n📊 *Исходы*")
+    lines.append(", ".join(f"{name}: `{count}`" for name, count in sorted(outcomes.items())) or "Запросов пока нет")
+
+    pool = HoroscopeAPI.pool_stats()
+    cache = horoscope_cache.stats()
+    translator = SimpleTranslator.stats()
+    memory = translation_memory.stats()
+    lines.extend([
+        "\n🔌 *Пул соединений*",
+        f"запросов `{pool['requests']}`, новых соединений `{pool['created']}`, "
+        f"переиспользовано `{pool['reused']}`, простаивает `{pool['idle']}`",
+        "\n🗂 *Кэш гороскопов*",
+        f"попаданий `{cache['hits']}`, промахов `{cache['misses']}`, устаревших `{cache['stale_hits']}`, "
+        f"записей `{cache['size']}`, доля попаданий `{cache['hit_ratio']}`",
+        "\n🌐 *Пул перевода*",
+        f"потоков `{translator['workers']}`, в очереди `{translator['queue_depth']}`, "
+        f"выполняется `{translator['running']}`, таймаутов `{translator['timeouts']}`",
+        "\n📚 *Память переводов*",
+        f"из памяти `{memory['memory_hits']}`, с диска `{memory['disk_hits']}`, промахов `{memory['misses']}`, "
+        f"вытеснено `{memory['evictions']}`, записей `{memory['size']}`, доля попаданий `{memory['hit_ratio']}`",
+    ])
+
+    await message.answer("\n".join(lines))
+
+
+@router.message(Command("delivery"))
+async def delivery_status(message: Message):
+    """
+    Показывает статистику рассылок при команде /delivery.
+
+    Выводит накопленные с запуска счётчики, отчёт о последнем слоте, очередь
+    доставки за сегодня, готовность кэша гороскопов (прогрев и ночная
+    предзагрузка) и число пользователей, отключённых от рассылки
+    (заблокировали бота или удалили аккаунт).
+
+    Args:
+        message (Message): Входящее сообщение с командой /delivery
+    """
+    if not check_admin(message.from_user.id):
+        await message.answer("⛔ У вас нет прав администратора")
+        logger.warning(f"[ADMIN] Попытка доступа без прав: {message.from_user.id}")
+        return
+
+    logger.info(f"[ADMIN_DELIVERY] {message.from_user.id}")
+
+    stats = DeliveryService.stats()
+    totals, last = stats["totals"], stats["last"]
+
+    lines = [
+        "📨 *Рассылки*\n",
+        f"слотов с запуска: `{totals['slots']}`, отправлено: `{totals['sent']}`, ошибок: `{totals['failed']}`",
+        f"отключено с запуска: `{totals['deactivated']}`, всего неактивных: `{count_inactive_users()}`",
+    ]
+
+    if last:
+        lines.append(
+            f"\n*Последний слот* `{last['label']}` ({last['finished_at']}):\n"
+            f"   отправлено `{last['sent']}` из `{last['total']}`, ошибок `{last['failed']}`\n"
+            f"   недоступных чатов `{last['blocked']}`, повторов `{last['retries']}`, "
+            f"пауз flood control `{last['flood_waits']}`\n"
+            f"   длительность `{last['seconds']}s`, скорость `{last['throughput']}` сообщ./с"
+        )
+    else:
+        lines.append("\nРассылок с запуска ещё не было")
+
+    outbox = count_deliveries(date.today().isoformat())
+    lines.append(
+        f"\n*Очередь доставки за сегодня:* отправлено `{outbox.get('sent', 0)}`, "
+        f"ожидают `{outbox.get('pending', 0)}`, ошибок `{outbox.get('failed', 0)}`, "
+        f"недоступных `{outbox.get('blocked', 0)}`"
+    )
+
+    readiness = SchedulerService.stats()
+    prewarm, prefetch = readiness["prewarm"], readiness["tomorrow_prefetch"]
+    if prewarm["date"]:
+        state = "✅ готов" if prewarm["ready"] else ("⏳ идёт" if "finished_at" not in prewarm else "⚠️ частично")
+        lines.append(
+            f"\n🔥 *Прогрев кэша* `{prewarm['date']}`: {state}, знаков `{prewarm['signs_ready']}/{prewarm['signs_total']}`, "
+            f"попыток `{prewarm['attempts']}`" + (f", завершён `{prewarm['finished_at']}`" if "finished_at" in prewarm else "")
+        )
+    else:
+        lines.append("\n🔥 *Прогрев кэша*: с запуска ещё не выполнялся")
+
+    if prefetch["date"]:
+        lines.append(f"🌙 *Предзагрузка на* `{prefetch['date']}`: знаков `{prefetch['signs_ready']}/{prefetch['signs_total']}`")
+
+    await message.answer("\n".join(lines))
@@ -7,9 +7,10 @@ from aiogram.types import Message, CallbackQuery
 from app.utils.logger import logger
 from app.database.crud import get_user, create_user, update_user_sign
 from app.services.horoscope_api import HoroscopeAPI
+from app.services.providers import TODAY, TOMORROW, WEEK
 from app.keyboards.main import (
     main_menu_kb, zodiac_kb, help_kb, back_to_menu_kb,
-    back_kb
+    back_kb, horoscope_kb
 )
 
 router = Router()
@@ -270,10 +271,32 @@ async def set_sign(callback: CallbackQuery):
 
 # ===================== HOROSCOPE =====================
 
+# Заголовок и пожелание для каждого горизонта гороскопа
+HOROSCOPE_TITLES = {
+    TODAY: ("ГОРОСКОП ДЛЯ {sign}", "💫 _Хорошего дня!_"),
+    TOMORROW: ("ГОРОСКОП НА ЗАВТРА ДЛЯ {sign}", "🌙 _Спокойной ночи и доброго утра!_"),
+    WEEK: ("ГОРОСКОП НА НЕДЕЛЮ ДЛЯ {sign}", "💫 _Удачной недели!_"),
+}
+
+
 @router.callback_query(F.data == "daily_horoscope")
 async def daily_horoscope(callback: CallbackQuery):
+    await show_horoscope(callback, TODAY)
+
+
+@router.callback_query(F.data.startswith("horoscope:"))
+async def horizon_horoscope(callback: CallbackQuery):
+    """Гороскоп на завтра или на неделю (callback_data: horoscope:tomorrow / horoscope:week)."""
+    horizon = callback.data.split(":")[1]
+    if horizon not in HOROSCOPE_TITLES:
+        await callback.answer()
+        return
+    await show_horoscope(callback, horizon)
+
+
+async def show_horoscope(callback: CallbackQuery, horizon: str):
     user_data = get_user(callback.from_user.id)
-    logger.info(f"[HOROSCOPE_REQUEST] {u(callback.from_user)}")
+    logger.info(f"[HOROSCOPE_REQUEST] {u(callback.from_user)} | {horizon}")
 
     if not user_data:
         logger.warning(f"[HOROSCOPE_NO_USER] {u(callback.from_user)} - user not found in DB")
@@ -286,19 +309,24 @@ async def daily_horoscope(callback: CallbackQuery):
         return
 
     try:
-        logger.info(f"[HOROSCOPE_FETCH] Getting horoscope for {user_data['sign']}")
-        text = await horoscope_api.get_daily_horoscope(user_data["sign"])
-        logger.info(f"[HOROSCOPE_OK] {u(callback.from_user)} | {user_data['sign']}")
+        logger.info(f"[HOROSCOPE_FETCH] Getting horoscope for {user_data['sign']} ({horizon})")
+        entry = await horoscope_api.get_horoscope_entry(user_data["sign"], horizon)
+        logger.info(f"[HOROSCOPE_OK] {u(callback.from_user)} | {user_data['sign']} | {horizon}")
 
+        title, wish = HOROSCOPE_TITLES[horizon]
         message = (
-            f"✨ *ГОРОСКОП ДЛЯ {user_data['sign'].upper()}*\n\n"
-            f"{text}\n\n"
-            "💫 _Хорошего дня!_"
+            f"✨ *{title.format(sign=user_data['sign'].upper())}*\n\n"
+            f"{entry['text']}\n\n"
+            f"{wish}"
         )
 
+        # Отдан вчерашний гороскоп, свежий загружается в фоне
+        if entry["refreshing"]:
+            message += "\n\n🔄 _Гороскоп на сегодня обновляется, загляните чуть позже_"
+
         await callback.message.edit_text(
             message,
-            reply_markup=back_to_menu_kb()
+            reply_markup=horoscope_kb(horizon)
         )
     except Exception as e:
         logger.exception(f"[HOROSCOPE_ERROR] {u(callback.from_user)} | {e}")
@@ -308,4 +336,4 @@ async def daily_horoscope(callback: CallbackQuery):
             reply_markup=back_to_menu_kb()
         )
 
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
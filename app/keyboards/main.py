@@ -82,6 +82,29 @@ def help_kb() -> InlineKeyboardMarkup:
     )
 
 
+# ===== ГОРИЗОНТ ГОРОСКОПА =====
+def horoscope_kb(current: str = "today") -> InlineKeyboardMarkup:
+    """Создает клавиатуру переключения гороскопа: сегодня / завтра / неделя
+
+    Args:
+        current: Текущий горизонт (его кнопка не показывается)
+    """
+    builder = InlineKeyboardBuilder()
+
+    horizons = {
+        "today": ("🔮 Сегодня", "daily_horoscope"),
+        "tomorrow": ("🌙 Завтра", "horoscope:tomorrow"),
+        "week": ("📅 Неделя", "horoscope:week"),
+    }
+    for horizon, (text, callback_data) in horizons.items():
+        if horizon != current:
+            builder.button(text=text, callback_data=callback_data)
+
+    builder.adjust(2)
+    builder.row(InlineKeyboardButton(text="⬅️ В меню", callback_data="menu"))
+    return builder.as_markup()
+
+
 # ===== ПРОСТЫЕ КНОПКИ НАВИГАЦИИ =====
 def back_to_menu_kb() -> InlineKeyboardMarkup:
     """Создает кнопку для возврата в главное меню"""
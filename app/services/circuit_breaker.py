@@ -0,0 +1,110 @@
+"""
+Предохранитель (circuit breaker) для внешних API
+=================================================
+Перестаёт обращаться к провайдеру после серии сбоев и периодически
+пропускает пробный запрос, чтобы понять, восстановился ли он.
+"""
+
+import time
+from typing import Any, Dict, Optional
+from app.utils.logger import logger
+
+
+class CircuitBreaker:
+    """
+    Предохранитель с тремя состояниями.
+
+    - closed: запросы проходят, сбои подряд считаются
+    - open: запросы сразу отклоняются до истечения recovery_timeout
+    - half_open: пропускается один пробный запрос; успех закрывает
+      предохранитель, сбой снова открывает
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 60.0):
+        """
+        Args:
+            name (str): Имя провайдера (для логов и статистики)
+            failure_threshold (int): Сколько сбоев подряд открывает предохранитель
+            recovery_timeout (float): Сколько секунд ждать перед пробным запросом
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started: Optional[float] = None
+
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Текущее состояние (open автоматически переходит в half_open по таймауту)."""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_started = None
+            logger.info(f"[BREAKER] {self.name}: half-open, пробуем пробный запрос")
+        return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Можно ли сейчас обращаться к провайдеру.
+
+        В состоянии half_open пропускается только один пробный запрос
+        (если он завис дольше recovery_timeout - ещё один).
+        """
+        state = self.state
+
+        if state == self.CLOSED:
+            return True
+
+        if state == self.HALF_OPEN:
+            now = time.monotonic()
+            if self._trial_started is None or now - self._trial_started >= self.recovery_timeout:
+                self._trial_started = now
+                return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Успешный ответ: сбрасывает счётчик сбоев и закрывает предохранитель."""
+        if self._state != self.CLOSED:
+            logger.success(f"[BREAKER] {self.name}: провайдер восстановился, closed")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        """Сбой: при достижении порога (или в half_open) открывает предохранитель."""
+        self._failures += 1
+
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"[BREAKER] {self.name}: open на {self.recovery_timeout}s "
+                               f"после {self._failures} сбоев")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_started = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние и счётчики предохранителя."""
+        state = self.state
+        retry_in = 0.0
+        if state == self.OPEN:
+            retry_in = max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+        return {
+            "state": state,
+            "failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in": round(retry_in, 1),
+        }
@@ -0,0 +1,356 @@
+# app/services/delivery_service.py
+# Параллельная рассылка сообщений в Telegram с ограничением частоты
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramForbiddenError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+)
+from app.database.crud import deactivate_users
+from app.utils.logger import logger
+
+
+class ChatGoneError(Exception):
+    """Чат больше недоступен для бота (заблокирован, удалён или не найден)."""
+
+
+class TokenBucket:
+    """
+    Корзина токенов: не больше rate операций в секунду с допустимым всплеском capacity.
+
+    Корзина стартует полной, поэтому за любое окно в одну секунду проходит
+    до capacity + rate операций.
+
+    Ожидающие получают токены по очереди (FIFO), поэтому ни один отправитель
+    не голодает.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Скорость пополнения (токенов в секунду)
+            capacity (float): Ёмкость корзины (максимальный всплеск)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Ждёт и забирает один токен."""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class DeliveryService:
+    """
+    Пул отправителей сообщений с общей корзиной токенов.
+
+    Ограничения Telegram: около 30 сообщений в секунду на бота и не больше
+    одного сообщения в секунду в один чат. WORKERS отправителей забирают
+    сообщения из общей очереди, каждое сообщение ждёт токен общей корзины
+    и паузу PER_CHAT_INTERVAL после предыдущего сообщения в тот же чат.
+
+    Ошибки доставки:
+    - TelegramRetryAfter (flood control): приостанавливаются все отправители на
+      указанное Telegram время, сообщение возвращается в очередь
+    - сетевые ошибки и 5xx: повтор с экспоненциальной задержкой со случайным
+      разбросом, не больше MAX_RETRIES раз
+    - бот заблокирован, аккаунт удалён или чат не найден: пользователь
+      помечается неактивным (is_active = 0) и больше не попадает в рассылку
+    - остальные ошибки: сообщение не доставлено
+
+    Итог по каждому чату ("sent", "failed" или "blocked") передаётся в
+    on_results пачками по RESULT_BATCH_SIZE, чтобы очередь доставки в базе
+    обновлялась по ходу рассылки, а не одним запросом на сообщение.
+    """
+
+    # Число одновременных отправителей
+    WORKERS = int(os.getenv("DELIVERY_WORKERS", "20"))
+
+    # Общий лимит сообщений в секунду (чуть ниже лимита Telegram) и всплеск.
+    # За любую секунду уходит до RATE + BURST сообщений, поэтому сумма не выше ~30
+    RATE = float(os.getenv("DELIVERY_RATE", "29"))
+    BURST = float(os.getenv("DELIVERY_BURST", "1"))
+
+    # Минимальный интервал между сообщениями в один чат (сек)
+    PER_CHAT_INTERVAL = 1.0
+
+    # Повторы при временных ошибках: число повторов и задержка (удваивается, с разбросом)
+    MAX_RETRIES = int(os.getenv("DELIVERY_MAX_RETRIES", "3"))
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 30.0
+
+    # Сколько раз сообщение может вернуться в очередь из-за flood control
+    MAX_FLOOD_REQUEUES = 5
+
+    # Сколько итогов доставки накапливается перед передачей в on_results
+    RESULT_BATCH_SIZE = 100
+
+    # Ошибки BadRequest, после которых в чат больше нечего отправлять
+    GONE_CHAT_ERRORS = ("chat not found", "user not found", "user is deactivated")
+
+    # Отчёт о последней рассылке и накопленные счётчики (общие для процесса, для админки)
+    last_report: Dict[str, Any] = {}
+    _totals: Dict[str, int] = {"slots": 0, "sent": 0, "failed": 0, "deactivated": 0}
+
+    def __init__(self, bot: Bot):
+        """
+        Args:
+            bot (Bot): Экземпляр Telegram бота для отправки сообщений
+        """
+        self.bot = bot
+        self.bucket = TokenBucket(self.RATE, self.BURST)
+
+        # Чат -> момент, раньше которого в него нельзя отправлять
+        self._chat_ready_at: Dict[int, float] = {}
+
+        # Общая пауза всех отправителей после TelegramRetryAfter
+        self._paused_until = 0.0
+
+    async def send_all(
+        self,
+        messages: List[Tuple[int, str]],
+        label: str = "",
+        on_results: Optional[Callable[[List[Tuple[int, str]]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Отправляет сообщения пулом отправителей.
+
+        Args:
+            messages (List[Tuple[int, str]]): Пары (chat_id, текст)
+            label (str): Метка рассылки для отчёта (например, время слота)
+            on_results (Optional[Callable]): Получает пачки итогов (chat_id, status),
+                последняя пачка передаётся после завершения рассылки
+
+        Returns:
+            Dict[str, Any]: Отчёт: отправлено, ошибок, длительность и скорость (сообщений в секунду)
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for chat_id, text in messages:
+            # Элемент очереди: (chat_id, текст, сколько раз возвращался из-за flood control)
+            queue.put_nowait((chat_id, text, 0))
+
+        counters = {"sent": 0, "failed": 0, "retries": 0, "flood_waits": 0, "requeued": 0, "blocked": 0}
+        gone_chats: List[int] = []
+        results: List[Tuple[int, str]] = []
+        started = time.perf_counter()
+
+        workers = [
+            asyncio.create_task(self._worker(queue, counters, gone_chats, results, on_results))
+            for _ in range(min(self.WORKERS, len(messages)))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        duration = time.perf_counter() - started
+        self._prune_chats()
+        self._flush_results(results, on_results)
+
+        # Недоступные чаты выключаются одним запросом после рассылки
+        deactivated = deactivate_users(gone_chats)
+
+        report = {
+            "label": label,
+            "total": len(messages),
+            **counters,
+            "deactivated": deactivated,
+            "seconds": round(duration, 1),
+            "throughput": round(counters["sent"] / duration, 1) if duration > 0 else 0.0,
+            "finished_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._record_report(report)
+
+        logger.info(
+            f"📨 Рассылка {label} завершена за {report['seconds']}s: "
+            f"отправлено {counters['sent']}/{len(messages)}, ошибок {counters['failed']}, "
+            f"повторов {counters['retries']}, пауз flood control {counters['flood_waits']}, "
+            f"отключено пользователей {deactivated}, {report['throughput']} сообщ./с"
+        )
+        return report
+
+    @classmethod
+    def _record_report(cls, report: Dict[str, Any]) -> None:
+        """Сохраняет отчёт о рассылке и обновляет накопленные счётчики."""
+        cls.last_report = report
+        cls._totals["slots"] += 1
+        for key in ("sent", "failed", "deactivated"):
+            cls._totals[key] += report[key]
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """
+        Статистика рассылок с момента запуска.
+
+        Returns:
+            Dict[str, Any]: Накопленные счётчики ("totals") и отчёт о последней рассылке ("last")
+        """
+        return {"totals": dict(cls._totals), "last": dict(cls.last_report)}
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue,
+        counters: Dict[str, int],
+        gone_chats: List[int],
+        results: List[Tuple[int, str]],
+        on_results: Optional[Callable[[List[Tuple[int, str]]], None]]
+    ) -> None:
+        """Отправитель: забирает сообщения из очереди, пока она не опустеет."""
+        while True:
+            chat_id, text, requeues = await queue.get()
+            status = None
+            try:
+                if await self._deliver(chat_id, text, counters):
+                    counters["sent"] += 1
+                    status = "sent"
+                else:
+                    counters["failed"] += 1
+                    status = "failed"
+
+            except ChatGoneError as e:
+                logger.info(f"📨 Пользователь {chat_id} недоступен ({e}), отключаем рассылку")
+                counters["blocked"] += 1
+                counters["failed"] += 1
+                gone_chats.append(chat_id)
+                status = "blocked"
+
+            except TelegramRetryAfter as e:
+                # Flood control: все отправители ждут, сообщение уходит в конец очереди
+                self._pause(e.retry_after)
+                counters["flood_waits"] += 1
+
+                if requeues < self.MAX_FLOOD_REQUEUES:
+                    counters["requeued"] += 1
+                    queue.put_nowait((chat_id, text, requeues + 1))
+                else:
+                    logger.error(f"📨 Сообщение {chat_id} не доставлено: flood control {requeues} раз подряд")
+                    counters["failed"] += 1
+                    status = "failed"
+
+            finally:
+                if status:
+                    results.append((chat_id, status))
+                    if len(results) >= self.RESULT_BATCH_SIZE:
+                        self._flush_results(results, on_results)
+                queue.task_done()
+
+    @staticmethod
+    def _flush_results(
+        results: List[Tuple[int, str]],
+        on_results: Optional[Callable[[List[Tuple[int, str]]], None]]
+    ) -> None:
+        """Передаёт накопленные итоги доставки в on_results и очищает список."""
+        if not results:
+            return
+
+        batch = results[:]
+        results.clear()
+        if on_results:
+            try:
+                on_results(batch)
+            except Exception as e:
+                logger.error(f"📨 Не удалось сохранить итоги доставки: {e}")
+
+    def _pause(self, seconds: float) -> None:
+        """Приостанавливает всех отправителей на seconds секунд (паузы не сокращаются)."""
+        paused_until = time.monotonic() + seconds
+        if paused_until > self._paused_until:
+            self._paused_until = paused_until
+            logger.warning(f"📨 Flood control: рассылка приостановлена на {seconds}s")
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Экспоненциальная задержка перед повтором со случайным разбросом ±50%."""
+        delay = min(self.RETRY_BASE_DELAY * 2 ** attempt, self.RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _deliver(self, chat_id: int, text: str, counters: Dict[str, int]) -> bool:
+        """
+        Отправляет одно сообщение, повторяя его при временных ошибках.
+
+        Returns:
+            bool: True, если сообщение отправлено
+
+        Raises:
+            TelegramRetryAfter: Flood control (обрабатывается в _worker)
+            ChatGoneError: Чат больше недоступен (обрабатывается в _worker)
+        """
+        for attempt in range(self.MAX_RETRIES + 1):
+            try:
+                await self._send(chat_id, text)
+                return True
+
+            except (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError) as e:
+                if attempt == self.MAX_RETRIES:
+                    logger.error(f"📨 Сообщение {chat_id} не доставлено после {attempt + 1} попыток: {e}")
+                    return False
+
+                delay = self._retry_delay(attempt)
+                counters["retries"] += 1
+                logger.warning(f"📨 Временная ошибка для {chat_id}: {e}, повтор через {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+            except TelegramRetryAfter:
+                raise
+
+            except TelegramForbiddenError as e:
+                # Бот заблокирован, пользователь удалён или бот исключён из чата
+                raise ChatGoneError(e.message) from e
+
+            except TelegramBadRequest as e:
+                if any(error in e.message.lower() for error in self.GONE_CHAT_ERRORS):
+                    raise ChatGoneError(e.message) from e
+                logger.error(f"📨 Ошибка отправки пользователю {chat_id}: {e}")
+                return False
+
+            except Exception as e:
+                logger.error(f"📨 Ошибка отправки пользователю {chat_id}: {e}")
+                return False
+
+        return False
+
+    async def _send(self, chat_id: int, text: str) -> None:
+        """Отправляет сообщение с учётом общей паузы, общего лимита и лимита на чат."""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        # Время отправки в чат резервируется до ожидания, чтобы два отправителя
+        # с сообщениями в один чат не проснулись одновременно
+        now = time.monotonic()
+        ready_at = max(self._chat_ready_at.get(chat_id, 0.0), now)
+        self._chat_ready_at[chat_id] = ready_at + self.PER_CHAT_INTERVAL
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+        await self.bucket.acquire()
+
+        # Пауза могла начаться, пока отправитель ждал токен
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+        await self.bot.send_message(chat_id=chat_id, text=text)
+        logger.debug(f"📨 Сообщение отправлено {chat_id}")
+
+    def _prune_chats(self) -> None:
+        """Удаляет чаты, интервал для которых уже истёк."""
+        now = time.monotonic()
+        self._chat_ready_at = {chat: ready for chat, ready in self._chat_ready_at.items() if ready > now}
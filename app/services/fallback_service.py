@@ -0,0 +1,81 @@
+# app/services/fallback_service.py
+# Детерминированные резервные гороскопы: один текст на знак и день
+
+import hashlib
+import random
+from datetime import date, timedelta
+from typing import List, Tuple
+from app.data.fallback_phrases import (
+    ADVICE, ELEMENT_OF_SIGN, HEALTH, LOVE, LUCKY_COLORS, OPENINGS, PERIOD_LABELS, WEEK_OPENINGS, WORK
+)
+from app.database.crud import get_horoscope_keys, save_horoscopes
+from app.services.providers import TODAY, WEEK
+from app.utils.logger import logger
+
+# Имя источника резервных гороскопов в таблице horoscopes
+FALLBACK_SOURCE = "fallback"
+
+
+def generate_fallback(sign_key: str, day: str, horizon: str = TODAY) -> str:
+    """
+    Собирает резервный гороскоп из банков фраз.
+
+    Генератор инициализируется хэшем (знак, дата), поэтому текст одинаков
+    при каждом запросе, в любом процессе и после перезапуска. Прогноз на
+    неделю говорит о неделе: свои вступления, «Совет недели», «Цвет недели».
+
+    Args:
+        sign_key (str): Знак зодиака на русском в нижнем регистре
+        day (str): Дата в формате ISO или ISO-неделя для WEEK ("2026-W42")
+        horizon (str): Горизонт прогноза (TODAY / TOMORROW / WEEK)
+
+    Returns:
+        str: Текст гороскопа (без заголовка со знаком)
+    """
+    seed = hashlib.sha256(f"{sign_key}:{day}".encode("utf-8")).hexdigest()
+    rng = random.Random(int(seed[:16], 16))
+
+    openings = WEEK_OPENINGS if horizon == WEEK else OPENINGS
+    labels = PERIOD_LABELS["week" if horizon == WEEK else "day"]
+
+    opening = rng.choice(openings[ELEMENT_OF_SIGN.get(sign_key, "air")])
+    spheres = rng.sample([rng.choice(LOVE), rng.choice(WORK), rng.choice(HEALTH)], 2)
+
+    return (
+        f"{opening} {' '.join(spheres)}\n\n"
+        f"{labels['advice']}: {rng.choice(ADVICE)}\n"
+        f"{labels['color']}: {rng.choice(LUCKY_COLORS)}, {labels['number']}: {rng.randint(1, 9)}."
+    )
+
+
+def precompute_fallbacks(signs: List[str], lang: str, start: date, days: int = 366) -> int:
+    """
+    Заранее сохраняет резервные гороскопы на days дней вперёд.
+
+    Уже сохранённые знаки и даты пропускаются, поэтому повторный вызов
+    дописывает только недостающие дни.
+
+    Args:
+        signs (List[str]): Знаки на русском в нижнем регистре
+        lang (str): Язык текстов
+        start (date): Первый день
+        days (int): Число дней (по умолчанию год)
+
+    Returns:
+        int: Сколько гороскопов добавлено
+    """
+    end = start + timedelta(days=days - 1)
+    existing = get_horoscope_keys(FALLBACK_SOURCE, lang, start.isoformat(), end.isoformat())
+
+    rows: List[Tuple[str, str, str, str, str]] = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        for sign_key in signs:
+            if (sign_key, day) not in existing:
+                rows.append((sign_key, day, lang, FALLBACK_SOURCE, generate_fallback(sign_key, day)))
+
+    if rows:
+        save_horoscopes(rows)
+        logger.info(f"[FALLBACK] Сохранено резервных гороскопов: {len(rows)} ({start} - {end})")
+
+    return len(rows)
@@ -6,11 +6,268 @@
 """
 
 import aiohttp
+import asyncio
 import os
-import random
-from typing import Optional, Dict
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from app.database.crud import get_horoscope, save_horoscope
+from app.services.fallback_service import FALLBACK_SOURCE, generate_fallback
+from app.services.providers import (
+    TODAY, TOMORROW, WEEK, HoroscopeProvider, ProviderRegistry, build_default_registry, stub_base_url
+)
 from app.services.translator_service import SimpleTranslator
 from app.utils.logger import logger
+from app.utils.metrics import stage_metrics
+
+
+# Часовой пояс, в котором провайдер гороскопов переключает день
+PROVIDER_TIMEZONE = ZoneInfo(os.getenv("HOROSCOPE_PROVIDER_TZ", "UTC"))
+
+
+def provider_today() -> date:
+    """Возвращает текущую дату по часовому поясу провайдера гороскопов."""
+    return datetime.now(PROVIDER_TIMEZONE).date()
+
+
+def provider_day_at(moment: datetime) -> str:
+    """
+    Дата провайдера в указанный момент.
+
+    Args:
+        moment (datetime): Момент времени (без часового пояса - местное время сервера)
+
+    Returns:
+        str: Дата в формате ISO по часовому поясу провайдера
+    """
+    return moment.astimezone(PROVIDER_TIMEZONE).date().isoformat()
+
+
+def next_provider_rollover() -> float:
+    """
+    Возвращает момент смены дня у провайдера.
+
+    Returns:
+        float: Unix-время ближайшей полуночи в часовом поясе провайдера
+    """
+    now = datetime.now(PROVIDER_TIMEZONE)
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), PROVIDER_TIMEZONE)
+    return midnight.timestamp()
+
+
+def horizon_day(horizon: str = TODAY) -> str:
+    """
+    Ключ даты, под которым хранится прогноз горизонта.
+
+    Прогноз на завтра хранится под завтрашней датой: после смены дня
+    он читается как сегодняшний без обращения к API.
+
+    Args:
+        horizon (str): TODAY / TOMORROW / WEEK
+
+    Returns:
+        str: Дата в формате ISO ("2026-01-31") или ISO-неделя ("2026-W05")
+    """
+    today = provider_today()
+    if horizon == TOMORROW:
+        return (today + timedelta(days=1)).isoformat()
+    if horizon == WEEK:
+        year, week, _ = today.isocalendar()
+        return f"{year}-W{week:02d}"
+    return today.isoformat()
+
+
+def horizon_expires_at(horizon: str = TODAY) -> float:
+    """
+    Момент, до которого прогноз горизонта актуален в кэше.
+
+    Returns:
+        float: Unix-время конца дня (для завтра - конца завтрашнего дня,
+        для недели - полночи следующего понедельника) у провайдера
+    """
+    rollover = next_provider_rollover()
+    if horizon == TOMORROW:
+        return rollover + 86400
+    if horizon == WEEK:
+        return rollover + 86400 * (6 - provider_today().weekday())
+    return rollover
+
+
+class HoroscopeCache:
+    """
+    Общий для процесса кэш переведённых гороскопов.
+
+    Ключ - (знак, дата провайдера, язык). Записи живут до смены дня у провайдера,
+    поэтому все потребители (обработчики и планировщик) видят один и тот же текст.
+    """
+
+    # Сколько секунд после истечения запись ещё хранится для get_stale
+    STALE_RETENTION = 86400
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, sign: str, day: str, lang: str) -> Optional[str]:
+        """
+        Возвращает текст из кэша, если запись существует и не устарела.
+
+        Args:
+            sign (str): Знак зодиака на русском
+            day (str): Дата провайдера в формате ISO
+            lang (str): Язык текста
+
+        Returns:
+            Optional[str]: Текст гороскопа или None при промахе
+        """
+        key = (sign, day, lang)
+        entry = self._entries.get(key)
+
+        if entry and entry[1] > time.time():
+            self.hits += 1
+            return entry[0]
+
+        # Запись, пережившая смену дня, остаётся до purge_expired - её может отдать get_stale
+        self.misses += 1
+        return None
+
+    def get_stale(self, sign: str, day: str, lang: str) -> Optional[str]:
+        """
+        Возвращает текст записи даже после смены дня (для stale-while-revalidate).
+
+        Args:
+            sign (str): Знак зодиака на русском
+            day (str): Дата провайдера в формате ISO (обычно вчерашняя)
+            lang (str): Язык текста
+
+        Returns:
+            Optional[str]: Текст гороскопа или None, если записи нет
+        """
+        entry = self._entries.get((sign, day, lang))
+        if entry:
+            self.stale_hits += 1
+            return entry[0]
+        return None
+
+    def set(self, sign: str, day: str, lang: str, text: str, expires_at: Optional[float] = None) -> None:
+        """Сохраняет текст в кэш до смены дня у провайдера (или до expires_at)."""
+        self._entries[(sign, day, lang)] = (text, expires_at or next_provider_rollover())
+
+        # Записи старше суток после истечения не нужны даже как устаревшие
+        self.purge_expired(grace=self.STALE_RETENTION)
+
+    def purge_expired(self, grace: float = 0) -> int:
+        """
+        Удаляет записи, устаревшие больше чем на grace секунд.
+
+        Returns:
+            int: Количество удалённых записей
+        """
+        now = time.time() - grace
+        expired = [key for key, (_, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш и сбрасывает счётчики."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Статистика кэша: попадания, промахи, размер и доля попаданий."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "size": len(self._entries),
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых запросов.
+
+    Первый вызов с ключом запускает загрузку, остальные ждут тот же future,
+    пока он не завершится. Отмена одного ожидающего не отменяет общую загрузку.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет loader один раз для всех одновременных вызовов с ключом key.
+
+        Args:
+            key (Hashable): Ключ запроса
+            loader (Callable): Фабрика корутины загрузки
+
+        Returns:
+            Any: Результат loader (общий для всех ожидающих)
+        """
+        future = self._in_flight.get(key)
+
+        if future is None:
+            self.started += 1
+            future = asyncio.ensure_future(loader())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.joined += 1
+            logger.debug(f"[API] Присоединение к уже идущему запросу: {key}")
+
+        return await asyncio.shield(future)
+
+    def claim(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        """
+        Регистрирует загрузку key, которую вызывающий выполнит сам (например, пакетом).
+
+        Если key уже загружается, возвращается его future: его нужно ждать
+        (через asyncio.shield), а не загружать заново. Иначе создаётся новый
+        future - вызовы run(key) ждут его, а вызывающий обязан завершить его
+        (set_result), в том числе при ошибке.
+
+        Returns:
+            Tuple[asyncio.Future, bool]: Future загрузки и признак того, что загружает вызывающий
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.joined += 1
+            return future, False
+
+        self.started += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return future, True
+
+    def stats(self) -> Dict[str, int]:
+        """Статистика: запущено загрузок, присоединившихся вызовов, загрузок в процессе."""
+        return {
+            "started": self.started,
+            "joined": self.joined,
+            "in_flight": len(self._in_flight),
+        }
+
+
+# Единственный экземпляр кэша на процесс - общий для всех HoroscopeAPI
+horoscope_cache = HoroscopeCache()
+
+# Общий для процесса реестр загрузок (sign, day) -> future
+horoscope_flights = SingleFlight()
+
+# Общий для процесса реестр источников гороскопов
+provider_registry = build_default_registry()
 
 
 class HoroscopeAPI:
@@ -18,29 +275,68 @@ class HoroscopeAPI:
     Сервис для получения ежедневных гороскопов из различных API.
 
     Возможности:
-    - Основной API (бесплатный, без ключа)
-    - Резервный API (с API ключом)
-    - Локальный резерв с случайными фразами
+    - Источники из реестра (см. app/services/providers.py), опрашиваемые
+      в порядке измеренной успешности и задержки
+    - Локальный резерв из банков фраз, детерминированный по знаку и дате
+      (см. app/services/fallback_service.py)
     - Автоматический перевод с английского на русский
+    - Общий кэш на день провайдера (см. HoroscopeCache)
+    - Сквозное хранение в SQLite (таблица horoscopes)
+    - Одна долгоживущая HTTP-сессия с пулом соединений на весь процесс
+    - Хеджирование: если лучший источник медлит, параллельно запрашивается следующий
+    - Предохранитель на каждый источник и короткий кэш сбоев по знакам
+    - Stale-while-revalidate после смены дня (опционально)
     - Полная обработка ошибок
     """
 
-    # Основной API - бесплатный, не требует авторизации
-    PRIMARY_API_URL = "https://ohmanda.com/api/horoscope"
+    # Язык, на котором гороскопы хранятся в кэше и отдаются пользователям
+    LANGUAGE = "ru"
+
+    # Stale-while-revalidate: сколько секунд после смены дня можно отдавать вчерашний текст
+    SERVE_STALE = os.getenv("HOROSCOPE_SERVE_STALE", "0") == "1"
+    STALE_WINDOW = int(os.getenv("HOROSCOPE_STALE_WINDOW_MINUTES", "120")) * 60
+
+    # Фоновые обновления (храним ссылки, чтобы задачи не собрал сборщик мусора)
+    _background_tasks: set = set()
 
-    # Резервный API - требует API ключ, возвращает структурированные данные
-    BACKUP_API_URL = "https://horoscope-app-api.vercel.app/api/v1/get-horoscope/daily"
+    # Сколько запросов к API одновременно делает get_all_daily_horoscopes
+    BULK_CONCURRENCY = 4
 
+    # Хеджирование запросов: если лучший источник не ответил за перцентиль своей задержки,
+    # параллельно запускается следующий и берётся первый успешный ответ
+    HEDGING_ENABLED = os.getenv("HOROSCOPE_HEDGING", "1") == "1"
+    HEDGE_PERCENTILE = float(os.getenv("HOROSCOPE_HEDGE_PERCENTILE", "95"))
+    HEDGE_DEFAULT_DELAY = 2.0    # Задержка, пока замеров мало
+    HEDGE_MIN_DELAY = 0.3
+    HEDGE_MAX_DELAY = 5.0
+    HEDGE_MIN_SAMPLES = 20
+
+    # Статистика хеджирования: гонки, а также победы и отмены по источникам ("<имя>_wins")
+    _hedge_counters: Dict[str, int] = {"races": 0}
+
+    # Настройки пула соединений общей HTTP-сессии
+    POOL_LIMIT = 100             # Всего соединений
+    POOL_LIMIT_PER_HOST = 20     # Соединений на один хост API
+    KEEPALIVE_TIMEOUT = 60       # Сколько секунд держать простаивающее соединение
+    DNS_CACHE_TTL = 300          # Сколько секунд кэшировать DNS
+
+    # Общая для всех экземпляров HTTP-сессия (создаётся при старте бота)
+    _session: Optional[aiohttp.ClientSession] = None
+
+    # Счётчики пула: новые соединения и повторно использованные
+    _pool_counters: Dict[str, int] = {"requests": 0, "created": 0, "reused": 0}
 
     def __init__(self):
         """
         Инициализация сервиса HoroscopeAPI.
 
-        Загружает API ключ из переменных окружения и подготавливает маппинг знаков зодиака.
-        API ключ используется только для резервного API при сбое основного.
+        Подключает общие кэш, реестр загрузок и реестр источников,
+        подготавливает маппинг знаков зодиака.
         """
-        self.api_key = os.getenv("ASTROLOGY_API_KEY")  # Опционально, для резервного API
         self.translator = SimpleTranslator()
+        self.cache = horoscope_cache
+        self.flights = horoscope_flights
+        self.registry: ProviderRegistry = provider_registry
 
         # Маппинг русских названий знаков зодиака на английские (для запросов к API)
         self.signs: Dict[str, str] = {
@@ -58,44 +354,115 @@ class HoroscopeAPI:
             "рыбы": "pisces",
         }
 
-        # Английские знаки с заглавной первой буквой (для резервного API)
-        self.signs_capitalized: Dict[str, str] = {
-            "овен": "Aries",
-            "телец": "Taurus",
-            "близнецы": "Gemini",
-            "рак": "Cancer",
-            "лев": "Leo",
-            "дева": "Virgo",
-            "весы": "Libra",
-            "скорпион": "Scorpio",
-            "стрелец": "Sagittarius",
-            "козерог": "Capricorn",
-            "водолей": "Aquarius",
-            "рыбы": "Pisces",
-        }
+    @classmethod
+    async def start_session(cls) -> aiohttp.ClientSession:
+        """
+        Создаёт общую HTTP-сессию с настроенным пулом соединений.
+
+        Вызывается при старте бота. Повторный вызов возвращает уже открытую сессию.
+
+        Returns:
+            aiohttp.ClientSession: Общая сессия для запросов к API гороскопов
+        """
+        if cls._session and not cls._session.closed:
+            return cls._session
+
+        connector = aiohttp.TCPConnector(
+            limit=cls.POOL_LIMIT,
+            limit_per_host=cls.POOL_LIMIT_PER_HOST,
+            keepalive_timeout=cls.KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=cls.DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+
+        # Трассировка: счётчики соединений и этапы dns / connect / response
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            cls._pool_counters["requests"] += 1
+            context.request_started = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            # Время до получения заголовков ответа (включая соединение)
+            stage_metrics.observe("response", time.perf_counter() - context.request_started)
+
+        async def on_dns_resolvehost_start(session, context, params):
+            context.dns_started = time.perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params):
+            stage_metrics.observe("dns", time.perf_counter() - context.dns_started)
 
-        # Локальные резервные фразы при сбое всех API
-        self.fallback_phrases: list = [
-            "Сегодня звезды благоволят к новым начинаниям.",
-            "День идеален для планирования будущего.",
-            "Слушайте свою интуицию - она не подведет.",
-            "Не бойтесь делать первый шаг в важных вопросах.",
-            "Сегодняшний день принесет приятные сюрпризы.",
-            "Хорошее время для завершения старых дел.",
-            "Звезды советуют проявить терпение в общении.",
-            "Сегодня вы особенно привлекательны для окружающих.",
-            "Уделите время саморазвитию и обучению.",
-            "Финансовые вопросы требуют особого внимания.",
-        ]
+        async def on_connection_create_start(session, context, params):
+            context.connect_started = time.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            cls._pool_counters["created"] += 1
+            stage_metrics.observe("connect", time.perf_counter() - context.connect_started)
+
+            # Источник передаётся через trace_request_ctx при запросе
+            provider = provider_registry.get((context.trace_request_ctx or {}).get("provider"))
+            if provider:
+                provider.connect_latency.add(time.perf_counter() - context.connect_started)
+
+        async def on_connection_reuseconn(session, context, params):
+            cls._pool_counters["reused"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+
+        cls._session = aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+        logger.info("[API] HTTP-сессия для API гороскопов открыта")
+
+        if stub_base_url():
+            logger.warning(f"[API] Источники гороскопов и переводчик направлены на стенд-сервер: {stub_base_url()}")
+        return cls._session
+
+    @classmethod
+    async def close_session(cls) -> None:
+        """Закрывает общую HTTP-сессию (вызывается при остановке бота)."""
+        if cls._session and not cls._session.closed:
+            await cls._session.close()
+            logger.info("[API] HTTP-сессия для API гороскопов закрыта")
+        cls._session = None
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, int]:
+        """
+        Статистика пула соединений общей сессии.
+
+        Returns:
+            Dict[str, int]: Число запросов, созданных и переиспользованных соединений,
+            а также текущее число простаивающих соединений в пуле
+        """
+        idle = 0
+        if cls._session and not cls._session.closed:
+            connector = cls._session.connector
+            idle = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+
+        return {**cls._pool_counters, "idle": idle}
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Возвращает общую сессию, открывая её при первом обращении."""
+        if self._session is None or self._session.closed:
+            return await self.start_session()
+        return self._session
 
     async def get_daily_horoscope(self, sign_ru: str) -> str:
         """
         Получить ежедневный гороскоп для знака зодиака.
 
         Метод реализует многоуровневую стратегию резервирования:
-        1. Пробуем основной бесплатный API
-        2. Пробуем резервный API (если есть API ключ)
-        3. Используем локальные случайные фразы
+        0. Отдаём текст из общего кэша, если он уже получен сегодня
+           (сначала память процесса, затем таблица horoscopes в SQLite)
+           Одновременные запросы одного знака объединяются в одну загрузку
+        1-2. Опрашиваем источники из реестра в порядке маршрутизации
+           (с хеджированием медленного источника следующим)
+        3. Используем локальные фразы (детерминированы по знаку и дате, в кэш не попадают)
 
         Args:
             sign_ru (str): Знак зодиака на русском (например, "козерог")
@@ -103,132 +470,567 @@ class HoroscopeAPI:
         Returns:
             str: Отформатированный текст гороскопа на русском с названием знака
         """
+        entry = await self.get_horoscope_entry(sign_ru)
+        return entry["text"]
+
+    async def get_horoscope_entry(self, sign_ru: str, horizon: str = TODAY) -> Dict[str, Any]:
+        """
+        То же, что get_daily_horoscope, но с признаком устаревшего текста и горизонтом.
+
+        Если включён SERVE_STALE и сегодняшнего текста ещё нет ни в кэше, ни в БД,
+        в пределах STALE_WINDOW после смены дня отдаётся вчерашний текст,
+        а свежий загружается в фоне (stale-while-revalidate).
+
+        Args:
+            sign_ru (str): Знак зодиака на русском (например, "козерог")
+            horizon (str): Горизонт прогноза: TODAY, TOMORROW или WEEK
+
+        Returns:
+            Dict[str, Any]: Отформатированный текст ("text") и признак того,
+            что отдан вчерашний текст и идёт обновление ("refreshing")
+        """
+        try:
+            with stage_metrics.timer("total"):
+                return await self._resolve_entry(sign_ru, horizon)
+        except Exception:
+            stage_metrics.count("error")
+            raise
+
+    async def _resolve_entry(self, sign_ru: str, horizon: str) -> Dict[str, Any]:
+        """Получение гороскопа для get_horoscope_entry (с учётом исходов в stage_metrics)."""
         logger.info(f"[API] Запрос гороскопа | знак={sign_ru}")
 
         # Проверяем корректность входного знака
         if sign_ru.lower() not in self.signs:
             logger.warning(f"[API] Неизвестный знак: {sign_ru}")
-            return "❌ Неизвестный знак зодиака. Пожалуйста, выберите знак из списка."
+            return {
+                "text": "❌ Неизвестный знак зодиака. Пожалуйста, выберите знак из списка.",
+                "refreshing": False,
+            }
+
+        sign_key = sign_ru.lower()
+        day = horizon_day(horizon)
+
+        # Уровень 0: Общий кэш на текущий день провайдера (или на дату горизонта)
+        cached = self.cache.get(sign_key, day, self.LANGUAGE)
+        if cached:
+            logger.debug(f"[API] Гороскоп из кэша: {sign_ru} ({horizon})")
+            stage_metrics.count("cache")
+            return {"text": self._format_horoscope(sign_ru, cached), "refreshing": False}
 
-        # Уровень 1: Пробуем основной API (бесплатный, без ключа)
-        horoscope = await self._try_primary_api(sign_ru)
+        # Сразу после смены дня можно отдать вчерашний текст и обновить его в фоне
+        stale = self._get_stale_text(sign_key) if horizon == TODAY else None
+        if stale:
+            # Сегодняшний текст мог уже сохранить другой процесс или ночная предзагрузка
+            stored = get_horoscope(sign_key, day, self.LANGUAGE)
+            if stored:
+                logger.debug(f"[API] Гороскоп из БД ({stored['source']}): {sign_key}")
+                stage_metrics.count("db")
+                self.cache.set(sign_key, day, self.LANGUAGE, stored["text"], horizon_expires_at(horizon))
+                return {"text": self._format_horoscope(sign_ru, stored["text"]), "refreshing": False}
 
-        # Уровень 2: Пробуем резервный API (требует ключ)
-        if not horoscope and self.api_key:
-            horoscope = await self._try_backup_api(sign_ru)
+            logger.debug(f"[API] Отдаём вчерашний гороскоп, обновляем в фоне: {sign_ru}")
+            self._refresh_in_background(sign_key, day)
+            stage_metrics.count("stale")
+            return {"text": self._format_horoscope(sign_ru, stale), "refreshing": True}
+
+        # Уровни 1-2: одновременные запросы одного знака ждут одну общую загрузку
+        text = await self.flights.run(
+            (sign_key, day),
+            lambda: self._load_horoscope(sign_key, day, horizon=horizon)
+        )
 
         # Уровень 3: Резерв с локальными фразами
-        if not horoscope:
-            horoscope = self._get_fallback_horoscope(sign_ru)
+        if not text:
             logger.info("[API] Используется резервный гороскоп")
+            stage_metrics.count("fallback")
+            return {"text": self._get_fallback_horoscope(sign_ru, day, horizon), "refreshing": False}
 
-        return horoscope
+        return {"text": self._format_horoscope(sign_ru, text), "refreshing": False}
 
-    async def _try_primary_api(self, sign_ru: str) -> Optional[str]:
+    def _get_stale_text(self, sign_key: str) -> Optional[str]:
         """
-        Попытка получить гороскоп из основного бесплатного API.
+        Возвращает вчерашний текст знака, если его можно отдать как устаревший.
 
         Args:
-            sign_ru (str): Знак зодиака на русском
+            sign_key (str): Знак зодиака на русском в нижнем регистре
+
+        Returns:
+            Optional[str]: Вчерашний текст или None (режим выключен, окно прошло, текста нет)
+        """
+        if not self.SERVE_STALE:
+            return None
+
+        # Окно считается от начала текущего дня провайдера
+        since_rollover = time.time() - (next_provider_rollover() - 86400)
+        if since_rollover > self.STALE_WINDOW:
+            return None
+
+        yesterday = (provider_today() - timedelta(days=1)).isoformat()
+        text = self.cache.get_stale(sign_key, yesterday, self.LANGUAGE)
+        if text:
+            return text
+
+        stored = get_horoscope(sign_key, yesterday, self.LANGUAGE)
+        return stored["text"] if stored else None
+
+    def _refresh_in_background(self, sign_key: str, day: str) -> None:
+        """Запускает фоновую загрузку сегодняшнего текста (через общий single-flight)."""
+        task = asyncio.ensure_future(
+            # Пользователь уже получил вчерашний текст - платные источники не расходуем
+            self.flights.run((sign_key, day), lambda: self._load_horoscope(sign_key, day, essential=False))
+        )
+        self._background_tasks.add(task)
+
+        def on_done(finished: asyncio.Future) -> None:
+            self._background_tasks.discard(finished)
+            if not finished.cancelled() and finished.exception():
+                logger.error(f"[API] Ошибка фонового обновления {sign_key}: {finished.exception()}")
+
+        task.add_done_callback(on_done)
+
+    async def _load_horoscope(
+        self, sign_key: str, day: str, essential: bool = True, horizon: str = TODAY
+    ) -> Optional[str]:
+        """
+        Загружает переведённый текст гороскопа из БД или из API и кладёт его в кэш.
+
+        Args:
+            sign_key (str): Знак зодиака на русском в нижнем регистре
+            day (str): Ключ даты горизонта (см. horizon_day)
+            essential (bool): Нет ли у пользователя другого текста (см. HoroscopeProvider.can_spend)
+            horizon (str): Горизонт прогноза
 
         Returns:
-            Optional[str]: Текст гороскопа или None при неудаче
+            Optional[str]: Текст гороскопа или None, если все API недоступны
+        """
+        stored = get_horoscope(sign_key, day, self.LANGUAGE)
+        if stored:
+            logger.debug(f"[API] Гороскоп из БД ({stored['source']}): {sign_key}")
+            stage_metrics.count("db")
+            self.cache.set(sign_key, day, self.LANGUAGE, stored["text"], horizon_expires_at(horizon))
+            return stored["text"]
+
+        # Уровни 1-2: источники по порядку, медленный хеджируется следующим
+        source, text = await self._fetch_with_hedging(sign_key, essential, horizon)
+
+        if not text:
+            return None
+
+        save_horoscope(sign_key, day, self.LANGUAGE, source, text)
+        self.cache.set(sign_key, day, self.LANGUAGE, text, horizon_expires_at(horizon))
+        return text
+
+    async def _fetch_with_hedging(
+        self, sign_key: str, essential: bool = True, horizon: str = TODAY
+    ) -> Tuple[Optional[str], Optional[str]]:
         """
+        Опрашивает источники в порядке маршрутизации, хеджируя медленный.
+
+        Если лучший источник не ответил за hedge_delay(), следующий запускается
+        параллельно и используется первый успешный ответ, а проигравший запрос
+        отменяется (его время ожидания учитывается как нижняя оценка задержки
+        источника). Если оба не ответили, остальные источники опрашиваются
+        по очереди. Хеджирующий запрос не обязателен, поэтому он не запускается
+        к источнику, бюджет которого уже сберегается.
+
+        Args:
+            sign_key (str): Знак зодиака на русском в нижнем регистре
+            essential (bool): Можно ли тратить сберегаемый бюджет источников
+            horizon (str): Горизонт прогноза (опрашиваются только источники, которые его отдают)
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: Имя источника и текст,
+            либо (None, None), если ни один источник не ответил
+        """
+        providers = self.registry.ranked(essential, horizon)
+        if not providers:
+            return None, None
+
+        first, rest = providers[0], providers[1:]
+        first_started = time.perf_counter()
+        first_task = asyncio.ensure_future(self._try_provider(first, sign_key, horizon))
+
+        if self.HEDGING_ENABLED and rest and rest[0].can_spend(False):
+            done, _ = await asyncio.wait({first_task}, timeout=self.hedge_delay(first))
+        else:
+            done = {first_task}
+            await first_task
+
+        if not done:
+            second, rest = rest[0], rest[1:]
+            logger.debug(f"[API] {first.name} медлит, запускаем {second.name} параллельно: {sign_key}")
+            self._count("races")
+
+            second_started = time.perf_counter()
+            second_task = asyncio.ensure_future(self._try_provider(second, sign_key, horizon))
+            racers = {first_task: (first, first_started), second_task: (second, second_started)}
+            pending = {first_task, second_task}
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    text = task.result()
+                    if not text:
+                        continue
+
+                    winner = racers[task][0].name
+                    self._count(f"{winner}_wins")
+
+                    for loser in pending:
+                        loser.cancel()
+                        provider, started = racers[loser]
+                        provider.record_cancelled(time.perf_counter() - started)
+                        self._count(f"{provider.name}_cancelled")
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+                    stage_metrics.count("primary" if task is first_task else "backup")
+                    return winner, text
+
+        elif first_task.result():
+            # Лучший источник успел ответить - хеджирование не понадобилось
+            stage_metrics.count("primary")
+            return first.name, first_task.result()
+
+        # Остальные источники - по очереди
+        for provider in rest:
+            text = await self._try_provider(provider, sign_key, horizon)
+            if text:
+                stage_metrics.count("backup")
+                return provider.name, text
+
+        return None, None
+
+    @classmethod
+    def _count(cls, key: str) -> None:
+        """Увеличивает счётчик статистики хеджирования."""
+        cls._hedge_counters[key] = cls._hedge_counters.get(key, 0) + 1
+
+    @classmethod
+    def hedge_delay(cls, provider: HoroscopeProvider) -> float:
+        """
+        Задержка перед запуском параллельного запроса к следующему источнику.
+
+        Равна HEDGE_PERCENTILE задержки ответа источника (в пределах
+        HEDGE_MIN_DELAY..HEDGE_MAX_DELAY), пока замеров мало - HEDGE_DEFAULT_DELAY.
+        """
+        if len(provider.latency) < cls.HEDGE_MIN_SAMPLES:
+            return cls.HEDGE_DEFAULT_DELAY
+
+        delay = provider.latency.percentile(cls.HEDGE_PERCENTILE)
+        return min(max(delay, cls.HEDGE_MIN_DELAY), cls.HEDGE_MAX_DELAY)
+
+    @classmethod
+    def hedge_stats(cls) -> Dict[str, Any]:
+        """
+        Статистика хеджирования и задержек источников.
+
+        Returns:
+            Dict[str, Any]: Счётчики гонок, доля побед каждого источника,
+            текущая задержка хеджирования и перцентили задержек
+        """
+        races = cls._hedge_counters["races"]
+        stats: Dict[str, Any] = dict(cls._hedge_counters)
+
+        for provider in provider_registry.all():
+            wins = cls._hedge_counters.get(f"{provider.name}_wins", 0)
+            stats[f"{provider.name}_win_rate"] = round(wins / races, 3) if races else 0.0
+            stats[f"{provider.name}_hedge_delay"] = round(cls.hedge_delay(provider), 3)
+            stats[f"{provider.name}_latency"] = provider.latency.summary()
+            stats[f"{provider.name}_connect_latency"] = provider.connect_latency.summary()
+
+        return stats
+
+    async def get_all_daily_horoscopes(
+        self, sign_keys: Optional[List[str]] = None, essential: bool = False, horizon: str = TODAY
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Получает гороскопы всех (или указанных) знаков одновременно.
+
+        Порядок для каждого знака тот же, что и в get_daily_horoscope:
+        кэш и БД, затем источники в порядке маршрутизации (тексты каждого
+        источника переводятся одним пакетом), затем локальные фразы.
+        Одновременно к API уходит не больше BULK_CONCURRENCY запросов.
+
+        Загрузки знаков регистрируются в общем single-flight: если знак уже
+        загружает пользовательский запрос, пакет ждёт его, а запросы
+        пользователей во время пакета ждут пакет - источник и переводчик
+        не вызываются дважды.
+
+        Для прогрева и рассылки локальные фразы - приемлемый результат, поэтому
+        по умолчанию источники со сберегаемым бюджетом не опрашиваются.
+
+        Args:
+            sign_keys (Optional[List[str]]): Знаки на русском (по умолчанию все 12)
+            essential (bool): Можно ли тратить сберегаемый бюджет источников
+            horizon (str): Горизонт прогноза (TOMORROW - для ночной предзагрузки)
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Для каждого знака - отформатированный текст ("text"),
+            источник ("source": cache / имя источника / fallback) и время получения в секундах ("seconds");
+            текст, загруженный одновременным запросом, отмечается как cache
+        """
+        day = horizon_day(horizon)
+        expires_at = horizon_expires_at(horizon)
+        signs = sorted({sign.lower() for sign in (sign_keys or self.signs) if sign.lower() in self.signs})
+        semaphore = asyncio.Semaphore(self.BULK_CONCURRENCY)
+        started = time.perf_counter()
+
+        texts: Dict[str, str] = {}
+        sources: Dict[str, str] = {}
+        timings: Dict[str, float] = {}
+
+        def elapsed() -> float:
+            return round(time.perf_counter() - started, 3)
+
+        # 1. Кэш процесса и БД
+        for sign_key in signs:
+            cached = self.cache.get(sign_key, day, self.LANGUAGE)
+            if not cached:
+                stored = get_horoscope(sign_key, day, self.LANGUAGE)
+                if stored:
+                    cached = stored["text"]
+                    self.cache.set(sign_key, day, self.LANGUAGE, cached, expires_at)
+
+            if cached:
+                texts[sign_key], sources[sign_key], timings[sign_key] = cached, "cache", elapsed()
+                stage_metrics.count("cache")
+
+        async def limited(coro_factory: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+            async with semaphore:
+                return await coro_factory()
+
+        # 2. Знаки без текста регистрируются в single-flight; уже загружаемые другими - ждём
+        claimed: Dict[str, asyncio.Future] = {}
+        joined: Dict[str, asyncio.Future] = {}
+        for sign_key in signs:
+            if sign_key not in texts:
+                future, owned = self.flights.claim((sign_key, day))
+                (claimed if owned else joined)[sign_key] = future
+
         try:
-            sign_en = self.signs.get(sign_ru.lower())
-            if not sign_en:
-                return None
+            # 3. Источники по порядку: тексты загружаются параллельно и переводятся одним пакетом
+            for rank, provider in enumerate(self.registry.ranked(essential, horizon)):
+                missing = [sign for sign in claimed if sign not in texts]
+                if not missing:
+                    break
 
-            async with aiohttp.ClientSession() as session:
-                # Эндпоинт основного API
-                url = f"{self.PRIMARY_API_URL}/{sign_en}/"
+                translated = await self._load_batch(provider, missing, limited, horizon)
+                for sign_key, text in translated.items():
+                    texts[sign_key], sources[sign_key], timings[sign_key] = text, provider.name, elapsed()
+                    stage_metrics.count("primary" if rank == 0 else "backup")
 
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        raw_text = data.get("horoscope", "")
+                    save_horoscope(sign_key, day, self.LANGUAGE, provider.name, text)
+                    self.cache.set(sign_key, day, self.LANGUAGE, text, expires_at)
+        finally:
+            # Ожидающие получают текст (или None - тогда каждый возьмёт резерв сам)
+            for sign_key, future in claimed.items():
+                if not future.done():
+                    future.set_result(texts.get(sign_key))
 
-                        if raw_text:
-                            logger.debug(f"[API] Основной API успешен: {sign_ru}")
-                            # Переводим с английского на русский
-                            translated = await self.translator.translate_text(raw_text)
-                            return self._format_horoscope(sign_ru, translated)
+        for sign_key, future in joined.items():
+            try:
+                text = await asyncio.shield(future)
+            except Exception as e:
+                logger.error(f"[API] Ошибка одновременной загрузки {sign_key}: {e}")
+                text = None
+            if text:
+                texts[sign_key], sources[sign_key], timings[sign_key] = text, "cache", elapsed()
 
-        except aiohttp.ClientError as e:
-            logger.error(f"[API] Сетевая ошибка основного API: {e}")
-        except Exception as e:
-            logger.exception(f"[API] Неожиданная ошибка основного API: {e}")
+        results: Dict[str, Dict[str, Any]] = {}
+        for sign_key in signs:
+            source = sources.get(sign_key)
 
-        return None
+            if source:
+                text = self._format_horoscope(sign_key, texts[sign_key])
+            else:
+                # 4. Локальные фразы (в кэш не попадают)
+                source, text = FALLBACK_SOURCE, self._get_fallback_horoscope(sign_key, day, horizon)
+                stage_metrics.count("fallback")
+                timings[sign_key] = elapsed()
+
+            results[sign_key] = {"text": text, "source": source, "seconds": timings[sign_key]}
+
+        summary: Dict[str, int] = {}
+        for result in results.values():
+            summary[result["source"]] = summary.get(result["source"], 0) + 1
+        logger.info(f"[API] Все гороскопы ({horizon}) получены за {elapsed()}s | {summary}")
+        return results
+
+    async def _load_batch(
+            self,
+            provider: HoroscopeProvider,
+            sign_keys: List[str],
+            limited: Callable[[Callable[[], Awaitable[Optional[str]]]], Awaitable[Optional[str]]],
+            horizon: str = TODAY
+    ) -> Dict[str, str]:
+        """
+        Получает тексты источника для нескольких знаков и переводит их одним пакетом.
+
+        Args:
+            provider (HoroscopeProvider): Источник
+            sign_keys (List[str]): Знаки зодиака на русском
+            limited (Callable): Обёртка, ограничивающая число одновременных запросов
+            horizon (str): Горизонт прогноза
+
+        Returns:
+            Dict[str, str]: Тексты на языке бота для знаков, которые удалось получить
+        """
+        raw_texts = await asyncio.gather(
+            *(limited(lambda sign=sign: self._fetch_raw(provider, sign, horizon)) for sign in sign_keys)
+        )
+        fetched = {sign: raw for sign, raw in zip(sign_keys, raw_texts) if raw}
+
+        if provider.language == self.LANGUAGE:
+            return fetched
+
+        # Непереведённые тексты не сохраняются: знак получит следующий источник или резерв
+        translated = await self.translator.translate_batch(list(fetched.values()))
+        untranslated = [sign for sign, text in zip(fetched, translated) if not text]
+        if untranslated:
+            logger.warning(f"[API] Перевод не удался ({provider.name}): {', '.join(untranslated)}")
+        return {sign: text for sign, text in zip(fetched, translated) if text}
 
-    async def _try_backup_api(self, sign_ru: str) -> Optional[str]:
+    def get_stored_horoscopes(self, sign_keys: List[str], day: str) -> Dict[str, str]:
         """
-        Попытка получить гороскоп из резервного API (требует API ключ).
+        Отформатированные гороскопы знаков на прошедшую дату (без обращения к API).
 
-        Примечание: Этот API требует английские знаки с заглавной буквы и специальные заголовки.
+        Источники отдают только текущий день, поэтому для прошедшей даты берётся
+        сохранённый в БД текст, а если его нет - резервный гороскоп на эту дату.
 
         Args:
-            sign_ru (str): Знак зодиака на русском
+            sign_keys (List[str]): Знаки на русском
+            day (str): Дата провайдера в формате ISO
+
+        Returns:
+            Dict[str, str]: Текст для каждого известного знака
+        """
+        results: Dict[str, str] = {}
+        for sign_key in {sign.lower() for sign in sign_keys if sign.lower() in self.signs}:
+            stored = get_horoscope(sign_key, day, self.LANGUAGE)
+            results[sign_key] = (
+                self._format_horoscope(sign_key, stored["text"]) if stored
+                else self._get_fallback_horoscope(sign_key, day)
+            )
+        return results
+
+    @classmethod
+    def stage_stats(cls) -> Dict[str, Dict]:
+        """
+        Гистограммы этапов получения гороскопа и счётчики исходов для админки.
+
+        Этапы: dns, connect, response (до заголовков ответа), decode (разбор JSON),
+        translate, format и total (весь запрос пользователя). Исходы: cache, stale,
+        db, primary, backup, fallback, error; загрузки, объединённые single-flight,
+        считаются один раз.
+        """
+        return stage_metrics.snapshot()
+
+    @classmethod
+    def provider_status(cls) -> Dict[str, Any]:
+        """
+        Состояние источников для админки.
 
         Returns:
-            Optional[str]: Текст гороскопа или None при неудаче
+            Dict[str, Any]: Для каждого источника в порядке маршрутизации -
+            предохранитель, кэш сбоев, квота, успешность, задержка и таймауты
+        """
+        return {provider.name: provider.stats() for provider in provider_registry.ranked()}
+
+    async def _try_provider(self, provider: HoroscopeProvider, sign_key: str, horizon: str = TODAY) -> Optional[str]:
         """
+        Получает гороскоп у источника и переводит его на язык бота.
+
+        Args:
+            provider (HoroscopeProvider): Источник
+            sign_key (str): Знак зодиака на русском в нижнем регистре
+            horizon (str): Горизонт прогноза
+
+        Returns:
+            Optional[str]: Текст гороскопа (без форматирования) или None при неудаче,
+            в том числе если текст не удалось перевести
+        """
+        raw_text = await self._fetch_raw(provider, sign_key, horizon)
+        if not raw_text:
+            return None
+
+        if provider.language == self.LANGUAGE:
+            return raw_text
+
+        # Переводим с английского на русский; английский текст не сохраняем под языком бота
+        translated = await self.translator.translate_text(raw_text)
+        if not translated:
+            logger.warning(f"[API] Перевод не удался ({provider.name}): {sign_key}")
+        return translated
+
+    async def _fetch_raw(self, provider: HoroscopeProvider, sign_key: str, horizon: str = TODAY) -> Optional[str]:
+        """
+        Запрашивает исходный текст у источника с учётом предохранителя и таймаутов.
+
+        Args:
+            provider (HoroscopeProvider): Источник
+            sign_key (str): Знак зодиака на русском в нижнем регистре
+            horizon (str): Горизонт прогноза
+
+        Returns:
+            Optional[str]: Текст на языке источника или None при неудаче
+        """
+        sign_en = self.signs.get(sign_key)
+        if not sign_en or not provider.supports(sign_en, horizon):
+            return None
+
+        # Кэш сбоев ведётся отдельно для каждого горизонта
+        target = sign_key if horizon == TODAY else f"{sign_key}:{horizon}"
+        if not provider.is_available(target):
+            return None
+
+        started = time.perf_counter()
         try:
-            sign_en_capitalized = self.signs_capitalized.get(sign_ru.lower())
-            if not sign_en_capitalized or not self.api_key:
-                return None
-
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    "sign": sign_en_capitalized,
-                    "day": "TODAY"
-                }
-
-                headers = {
-                    "X-RapidAPI-Key": self.api_key,
-                    "X-RapidAPI-Host": "horoscope-app-api.vercel.app"
-                }
-
-                async with session.get(
-                        self.BACKUP_API_URL,
-                        params=params,
-                        headers=headers,
-                        timeout=10
-                ) as response:
-
-                    if response.status == 200:
-                        data = await response.json()
-                        # Извлекаем гороскоп из вложенной структуры
-                        raw_text = data.get("data", {}).get("horoscope_data", "")
-
-                        if raw_text:
-                            logger.debug(f"[API] Резервный API успешен: {sign_ru}")
-                            return self._format_horoscope(sign_ru, raw_text)
-                    else:
-                        error_data = await response.json()
-                        logger.error(f"[API] Ошибка резервного API: {error_data}")
+            session = await self._get_session()
 
+            provider.record_request()
+            raw_text = await provider.fetch(session, sign_en, provider.timeout(), horizon)
+
+            if raw_text:
+                logger.debug(f"[API] {provider.name} успешен: {target}")
+                provider.record_success(target, time.perf_counter() - started)
+                return raw_text
+
+        except asyncio.TimeoutError:
+            # Раньше ClientError: таймауты aiohttp (ServerTimeoutError) - его подклассы
+            logger.error(f"[API] Таймаут {provider.name}: {target}")
+            provider.record_timeout(target, time.perf_counter() - started)
+            return None
         except aiohttp.ClientError as e:
-            logger.error(f"[API] Сетевая ошибка резервного API: {e}")
+            logger.error(f"[API] Сетевая ошибка {provider.name}: {e}")
         except Exception as e:
-            logger.exception(f"[API] Неожиданная ошибка резервного API: {e}")
+            logger.exception(f"[API] Неожиданная ошибка {provider.name}: {e}")
 
+        provider.record_failure(target)
         return None
 
-    def _get_fallback_horoscope(self, sign_ru: str) -> str:
+    def _get_fallback_horoscope(self, sign_ru: str, day: Optional[str] = None, horizon: str = TODAY) -> str:
         """
-        Генерирует резервный гороскоп из локальных фраз.
+        Возвращает резервный гороскоп из локальных фраз.
 
-        Используется при сбое всех API. Возвращает случайную фразу из предустановленного списка.
+        Используется при сбое всех API. Текст детерминирован по (знак, дата):
+        берётся заранее сохранённый в БД, а если его нет - собирается на месте.
 
         Args:
             sign_ru (str): Знак зодиака на русском
+            day (Optional[str]): Ключ даты горизонта (по умолчанию сегодня)
+            horizon (str): Горизонт прогноза (для недели - текст о неделе)
 
         Returns:
             str: Отформатированный резервный гороскоп
         """
-        phrase = random.choice(self.fallback_phrases)
-        return self._format_horoscope(sign_ru, phrase)
+        sign_key = sign_ru.lower()
+        day = day or provider_today().isoformat()
+
+        stored = get_horoscope(sign_key, day, self.LANGUAGE, source=FALLBACK_SOURCE)
+        text = stored["text"] if stored else generate_fallback(sign_key, day, horizon)
+        return self._format_horoscope(sign_ru, text)
 
     def _format_horoscope(self, sign_ru: str, text: str) -> str:
         """
@@ -243,8 +1045,9 @@ class HoroscopeAPI:
         Returns:
             str: Отформатированный гороскоп, готовый для Telegram
         """
-        # Приводим название знака к виду с заглавной буквы
-        sign_formatted = sign_ru.capitalize()
+        with stage_metrics.timer("format"):
+            # Приводим название знака к виду с заглавной буквы
+            sign_formatted = sign_ru.capitalize()
 
-        # Форматируем с Markdown для Telegram
-        return f"🔮 *{sign_formatted}*\n\n{text}"
+            # Форматируем с Markdown для Telegram
+            return f"🔮 *{sign_formatted}*\n\n{text}"
@@ -0,0 +1,518 @@
+"""
+Провайдеры гороскопов
+======================
+Общий интерфейс источников гороскопов и реестр, который упорядочивает
+их по измеренной успешности и задержке.
+
+Чтобы добавить новый источник, достаточно унаследовать HoroscopeProvider,
+реализовать fetch() и зарегистрировать экземпляр в реестре.
+"""
+
+import aiohttp
+import hashlib
+import os
+import time
+from typing import Any, Dict, List, Optional
+from app.database.crud import get_api_usage, increment_api_usage
+from app.services.circuit_breaker import CircuitBreaker
+from app.utils.logger import logger
+from app.utils.metrics import RollingLatency, stage_metrics
+
+# Горизонты прогноза: на сегодня, на завтра и на текущую неделю
+TODAY = "today"
+TOMORROW = "tomorrow"
+WEEK = "week"
+
+
+def stub_base_url() -> Optional[str]:
+    """
+    Адрес локального стенд-сервера источников (HOROSCOPE_PROVIDER_BASE_URL).
+
+    Если задан, все источники обращаются к стенду (app/services/stub_provider_server.py)
+    вместо настоящих API. Читается при каждом запросе, а не при импорте.
+    """
+    return os.getenv("HOROSCOPE_PROVIDER_BASE_URL", "").rstrip("/") or None
+
+
+class HoroscopeProvider:
+    """
+    Базовый класс источника гороскопов.
+
+    Каждый источник объявляет:
+    - name: уникальное имя (попадает в БД как source)
+    - language: язык текстов (если не совпадает с языком бота - текст переводится)
+    - cost: условная стоимость одного запроса (при прочих равных выбирается дешёвый)
+    - quota: лимит запросов в день или None
+    - monthly_quota: лимит запросов в месяц или None
+    - horizons: горизонты прогноза, которые отдаёт источник (TODAY / TOMORROW / WEEK)
+
+    Состояние источника (предохранитель, кэш сбоев, окна задержек,
+    адаптивные таймауты, счётчики) хранится в самом экземпляре.
+    """
+
+    name = "base"
+    language = "en"
+    cost = 0.0
+    quota: Optional[int] = None
+    monthly_quota: Optional[int] = None
+    horizons = (TODAY,)
+
+    # Доля бюджета, после которой источник используется только для запросов,
+    # которым больше нечего показать (без кэша и вчерашнего текста)
+    SOFT_BUDGET_RATIO = 0.8
+
+    # Ожидаемая задержка (сек), пока замеров нет - задаёт начальный порядок источников
+    default_latency = 1.0
+
+    # Предохранитель: сколько сбоев подряд открывает его и через сколько секунд пробовать снова
+    BREAKER_FAILURE_THRESHOLD = 5
+    BREAKER_RECOVERY_TIMEOUT = 60.0
+
+    # Кэш сбоев: сколько секунд не запрашивать источник для знака после сбоя
+    NEGATIVE_CACHE_TTL = 30.0
+
+    # Адаптивные таймауты: перцентиль задержки + запас, в пределах [floor, ceiling].
+    # Пока замеров меньше TIMEOUT_MIN_SAMPLES, используется default
+    TIMEOUT_PERCENTILE = 99
+    TIMEOUT_MIN_SAMPLES = 20
+    CONNECT_TIMEOUT = {"margin": 0.5, "floor": 1.0, "ceiling": 5.0, "default": 5.0}
+    READ_TIMEOUT = {"margin": 1.0, "floor": 2.0, "ceiling": 10.0, "default": 10.0}
+
+    # Общий предел запроса (включая ожидание свободного соединения пула)
+    TOTAL_TIMEOUT = 10.0
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(self.name, self.BREAKER_FAILURE_THRESHOLD, self.BREAKER_RECOVERY_TIMEOUT)
+
+        # Скользящие окна задержек: полный ответ и установка TCP/TLS соединения
+        self.latency = RollingLatency()
+        self.connect_latency = RollingLatency()
+
+        self.successes = 0
+        self.failures = 0
+
+        # Кэш сбоев: знак -> момент, до которого источник для знака не запрашивается
+        self._negative_cache: Dict[str, float] = {}
+
+        # Счётчики запросов за текущие день и месяц (для quota / monthly_quota)
+        self._usage_periods: Dict[str, str] = {}
+        self._usage: Dict[str, int] = {"day": 0, "month": 0}
+
+    def is_configured(self) -> bool:
+        """Готов ли источник к работе (например, задан ли API ключ)."""
+        return True
+
+    def supports(self, sign_en: str, horizon: str = TODAY) -> bool:
+        """Умеет ли источник отдавать гороскоп для знака на указанный горизонт."""
+        return horizon in self.horizons
+
+    async def fetch(self, session: aiohttp.ClientSession, sign_en: str,
+                    timeout: aiohttp.ClientTimeout, horizon: str = TODAY) -> Optional[str]:
+        """
+        Запрашивает текст гороскопа у источника.
+
+        Args:
+            session (aiohttp.ClientSession): Общая HTTP-сессия
+            sign_en (str): Знак зодиака на английском в нижнем регистре ("aries")
+            timeout (aiohttp.ClientTimeout): Таймауты запроса
+            horizon (str): Горизонт прогноза (один из horizons)
+
+        Returns:
+            Optional[str]: Текст на языке language или None, если источник не ответил текстом
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: Сетевые ошибки обрабатывает вызывающий код
+        """
+        raise NotImplementedError
+
+    # ---------- Доступность ----------
+
+    def budget(self) -> Dict[str, Optional[int]]:
+        """Лимиты запросов за день и за месяц (None - без лимита)."""
+        return {"day": self.quota, "month": self.monthly_quota}
+
+    def usage(self) -> Dict[str, int]:
+        """Число запросов за текущие день и месяц."""
+        self._roll_usage_periods()
+        return dict(self._usage)
+
+    def budget_usage_ratio(self) -> float:
+        """Наибольшая доля израсходованного бюджета среди периодов (0, если лимитов нет)."""
+        usage = self.usage()
+        ratios = [usage[period] / limit for period, limit in self.budget().items() if limit]
+        return max(ratios, default=0.0)
+
+    def has_quota(self) -> bool:
+        """Остались ли запросы во всех лимитах."""
+        return self.budget_usage_ratio() < 1.0
+
+    def can_spend(self, essential: bool) -> bool:
+        """
+        Стоит ли тратить запрос к источнику.
+
+        После SOFT_BUDGET_RATIO бюджета источник используется только для
+        essential-запросов: когда пользователю больше нечего показать.
+        Хеджирование, прогрев и фоновые обновления в этот момент обходятся
+        кэшем или локальными фразами.
+
+        Args:
+            essential (bool): Нет ли альтернативы ответу источника
+        """
+        ratio = self.budget_usage_ratio()
+        if ratio >= 1.0:
+            return False
+        return essential or ratio < self.SOFT_BUDGET_RATIO
+
+    def is_available(self, sign_key: str) -> bool:
+        """
+        Можно ли прямо сейчас обратиться к источнику за знаком.
+
+        Учитывает квоту, кэш сбоев по знаку и предохранитель. В состоянии
+        half_open предохранитель пропускает единственный пробный запрос,
+        поэтому метод вызывается непосредственно перед запросом.
+        """
+        if not self.has_quota():
+            logger.debug(f"[API] {self.name} пропущен: квота исчерпана")
+            return False
+
+        failed_until = self._negative_cache.get(sign_key)
+        if failed_until:
+            if failed_until > time.monotonic():
+                logger.debug(f"[API] {self.name} пропущен: недавний сбой для {sign_key}")
+                return False
+            del self._negative_cache[sign_key]
+
+        if not self.breaker.allow_request():
+            logger.debug(f"[API] {self.name} пропущен: предохранитель открыт")
+            return False
+
+        return True
+
+    @staticmethod
+    def _current_periods() -> Dict[str, str]:
+        """Текущие период-день и период-месяц ("2026-01-31", "2026-01")."""
+        return {"day": time.strftime("%Y-%m-%d"), "month": time.strftime("%Y-%m")}
+
+    def _roll_usage_periods(self) -> None:
+        """Сбрасывает счётчики запросов при смене дня или месяца."""
+        for name, period in self._current_periods().items():
+            if self._usage_periods.get(name) != period:
+                self._usage_periods[name] = period
+                self._usage[name] = 0
+
+    # ---------- Учёт результатов ----------
+
+    def record_request(self) -> None:
+        """Учитывает отправленный запрос в лимитах."""
+        self._roll_usage_periods()
+        for name in self._usage:
+            self._usage[name] += 1
+
+    def record_success(self, sign_key: str, seconds: float) -> None:
+        """Успешный ответ: задержка в окно, сброс кэша сбоев, закрытие предохранителя."""
+        self.successes += 1
+        self.latency.add(seconds)
+        self.breaker.record_success()
+        self._negative_cache.pop(sign_key, None)
+
+    def record_cancelled(self, seconds: float) -> None:
+        """
+        Запрос отменён, потому что хеджирующий запрос ответил раньше.
+
+        Прошедшее время - нижняя оценка задержки: без неё источник, который
+        всегда медленнее задержки хеджирования, никогда не получит замеров.
+        """
+        self.latency.add(seconds)
+
+    def record_timeout(self, sign_key: str, seconds: float) -> None:
+        """
+        Таймаут: сбой, а прошедшее время - нижняя оценка задержки.
+
+        Без этого замера таймаут чтения, опустившийся до floor, не вырос бы
+        после замедления источника: каждый запрос обрывался бы без замера.
+        """
+        self.latency.add(seconds)
+        self.record_failure(sign_key)
+
+    def record_failure(self, sign_key: str) -> None:
+        """Сбой: учёт в предохранителе и кэше сбоев по знаку."""
+        self.failures += 1
+        self.breaker.record_failure()
+        self._negative_cache[sign_key] = time.monotonic() + self.NEGATIVE_CACHE_TTL
+
+    # ---------- Метрики для маршрутизации ----------
+
+    def success_rate(self) -> float:
+        """Доля успешных ответов (сглаженная, чтобы новый источник не получал 0 или 1)."""
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def expected_latency(self) -> float:
+        """Медианная задержка ответа или default_latency, пока замеров нет."""
+        return self.latency.percentile(50) or self.default_latency
+
+    def score(self) -> float:
+        """
+        Ожидаемое время до успешного ответа (задержка / доля успехов) с поправкой на стоимость.
+
+        Чем меньше, тем выше источник в порядке опроса: платный источник
+        с cost=1 должен быть вдвое быстрее бесплатного, чтобы обогнать его.
+        """
+        return self.expected_latency() / self.success_rate() * (1 + self.cost)
+
+    def _adaptive_timeout(self, window: RollingLatency, settings: Dict[str, float]) -> float:
+        """Таймаут по перцентилю окна задержек с запасом, ограниченный снизу и сверху."""
+        if len(window) < self.TIMEOUT_MIN_SAMPLES:
+            return settings["default"]
+
+        value = window.percentile(self.TIMEOUT_PERCENTILE) + settings["margin"]
+        return min(max(value, settings["floor"]), settings["ceiling"])
+
+    def timeout(self) -> aiohttp.ClientTimeout:
+        """
+        Таймауты запроса по наблюдаемым задержкам источника.
+
+        Returns:
+            aiohttp.ClientTimeout: Адаптивные таймауты на установку соединения и на чтение
+            ответа, а также пределы на весь запрос (TOTAL_TIMEOUT) и на получение
+            соединения из пула (потолок CONNECT_TIMEOUT)
+        """
+        return aiohttp.ClientTimeout(
+            total=self.TOTAL_TIMEOUT,
+            connect=self.CONNECT_TIMEOUT["ceiling"],
+            sock_connect=self._adaptive_timeout(self.connect_latency, self.CONNECT_TIMEOUT),
+            sock_read=self._adaptive_timeout(self.latency, self.READ_TIMEOUT),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние источника для админки."""
+        now = time.monotonic()
+        timeout = self.timeout()
+        usage = self.usage()
+        budget = self.budget()
+
+        return {
+            **self.breaker.stats(),
+            "language": self.language,
+            "cost": self.cost,
+            "usage_day": usage["day"],
+            "usage_month": usage["month"],
+            "budget_day": budget["day"],
+            "budget_month": budget["month"],
+            "remaining_day": budget["day"] - usage["day"] if budget["day"] else None,
+            "remaining_month": budget["month"] - usage["month"] if budget["month"] else None,
+            "budget_saving": not self.can_spend(False),
+            "successes": self.successes,
+            "success_rate": round(self.success_rate(), 3),
+            "p50": round(self.expected_latency(), 3),
+            "score": round(self.score(), 3),
+            "negative_cached": sum(1 for until in self._negative_cache.values() if until > now),
+            "connect_timeout": round(timeout.sock_connect, 2),
+            "read_timeout": round(timeout.sock_read, 2),
+        }
+
+
+class OhmandaProvider(HoroscopeProvider):
+    """Бесплатный API ohmanda.com (без ключа, только текущий день)."""
+
+    name = "ohmanda"
+    language = "en"
+    cost = 0.0
+    default_latency = 1.0
+
+    URL = "https://ohmanda.com/api/horoscope"
+    STUB_PATH = "/api/horoscope"
+
+    @property
+    def url(self) -> str:
+        base = stub_base_url()
+        return f"{base}{self.STUB_PATH}" if base else self.URL
+
+    async def fetch(self, session: aiohttp.ClientSession, sign_en: str,
+                    timeout: aiohttp.ClientTimeout, horizon: str = TODAY) -> Optional[str]:
+        async with session.get(
+                f"{self.url}/{sign_en}/",
+                timeout=timeout,
+                trace_request_ctx={"provider": self.name}
+        ) as response:
+            if response.status == 200:
+                with stage_metrics.timer("decode"):
+                    data = await response.json()
+                return data.get("horoscope") or None
+
+            logger.error(f"[API] {self.name}: HTTP {response.status}")
+            return None
+
+
+class RapidApiProvider(HoroscopeProvider):
+    """
+    API horoscope-app-api через RapidAPI (требует ключ ASTROLOGY_API_KEY).
+
+    Запросы по ключу учитываются в таблице api_usage, поэтому дневной и
+    месячный бюджет общий для всех перезапусков и реплик.
+
+    Примечание: этот API требует знак с заглавной буквы и специальные заголовки.
+    """
+
+    name = "rapidapi"
+    language = "en"
+    cost = 1.0
+    default_latency = 1.5
+
+    horizons = (TODAY, TOMORROW, WEEK)
+
+    quota = int(os.getenv("RAPIDAPI_DAILY_BUDGET", "100")) or None
+    monthly_quota = int(os.getenv("RAPIDAPI_MONTHLY_BUDGET", "1000")) or None
+
+    # Как часто (в секундах) перечитывать счётчики из БД (их могли увеличить другие реплики)
+    USAGE_REFRESH_INTERVAL = 60
+
+    URL = "https://horoscope-app-api.vercel.app/api/v1/get-horoscope"
+    HOST = "horoscope-app-api.vercel.app"
+    STUB_PATH = "/api/v1/get-horoscope"
+
+    # Горизонт -> (путь, значение параметра day)
+    ENDPOINTS = {
+        TODAY: ("daily", "TODAY"),
+        TOMORROW: ("daily", "TOMORROW"),
+        WEEK: ("weekly", None),
+    }
+
+    def __init__(self):
+        super().__init__()
+        self._usage_loaded_at = 0.0
+        self._usage_key_hash: Optional[str] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        """
+        Ключ читается при каждом обращении: .env может загрузиться после импорта.
+
+        Стенд-серверу ключ не нужен, а его запросы не расходуют бюджет настоящего ключа.
+        """
+        if stub_base_url():
+            return "stub"
+        return os.getenv("ASTROLOGY_API_KEY")
+
+    @property
+    def url(self) -> str:
+        base = stub_base_url()
+        return f"{base}{self.STUB_PATH}" if base else self.URL
+
+    @property
+    def key_hash(self) -> str:
+        """Хэш ключа для учёта запросов (сам ключ в БД не хранится)."""
+        return hashlib.sha256((self.api_key or "").encode("utf-8")).hexdigest()[:16]
+
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+
+    def usage(self) -> Dict[str, int]:
+        """Число запросов по ключу за день и месяц (из БД, не чаще раза в USAGE_REFRESH_INTERVAL)."""
+        self._roll_usage_periods()
+        key_hash = self.key_hash
+        now = time.monotonic()
+
+        if key_hash != self._usage_key_hash or now - self._usage_loaded_at >= self.USAGE_REFRESH_INTERVAL:
+            periods = self._current_periods()
+            stored = get_api_usage(key_hash, list(periods.values()))
+            self._usage = {name: stored[period] for name, period in periods.items()}
+            self._usage_key_hash = key_hash
+            self._usage_loaded_at = now
+
+        return dict(self._usage)
+
+    def record_request(self) -> None:
+        """Учитывает запрос в памяти и в таблице api_usage."""
+        super().record_request()
+        increment_api_usage(self.key_hash, list(self._current_periods().values()))
+
+    async def fetch(self, session: aiohttp.ClientSession, sign_en: str,
+                    timeout: aiohttp.ClientTimeout, horizon: str = TODAY) -> Optional[str]:
+        path, day = self.ENDPOINTS[horizon]
+        params = {"sign": sign_en.capitalize()}
+        if day:
+            params["day"] = day
+
+        headers = {
+            "X-RapidAPI-Key": self.api_key,
+            "X-RapidAPI-Host": self.HOST
+        }
+
+        async with session.get(
+                f"{self.url}/{path}",
+                params=params,
+                headers=headers,
+                timeout=timeout,
+                trace_request_ctx={"provider": self.name}
+        ) as response:
+            if response.status == 200:
+                with stage_metrics.timer("decode"):
+                    data = await response.json()
+                # Извлекаем гороскоп из вложенной структуры
+                return data.get("data", {}).get("horoscope_data") or None
+
+            error_data = await response.text()
+            logger.error(f"[API] {self.name}: HTTP {response.status} {error_data[:200]}")
+            return None
+
+
+class ProviderRegistry:
+    """
+    Реестр источников гороскопов с маршрутизацией.
+
+    Порядок опроса определяется не регистрацией, а измерениями:
+    доступные источники с квотой идут первыми, внутри - по возрастанию
+    ожидаемого времени до успешного ответа с поправкой на стоимость (score).
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, HoroscopeProvider] = {}
+
+    def register(self, provider: HoroscopeProvider) -> None:
+        """Регистрирует источник (источник с тем же именем заменяется)."""
+        self._providers[provider.name] = provider
+        logger.debug(f"[API] Источник зарегистрирован: {provider.name}")
+
+    def unregister(self, name: str) -> None:
+        """Удаляет источник из реестра."""
+        self._providers.pop(name, None)
+
+    def get(self, name: str) -> Optional[HoroscopeProvider]:
+        """Возвращает источник по имени."""
+        return self._providers.get(name)
+
+    def all(self) -> List[HoroscopeProvider]:
+        """Все зарегистрированные источники в порядке регистрации."""
+        return list(self._providers.values())
+
+    def ranked(self, essential: bool = True, horizon: Optional[str] = None) -> List[HoroscopeProvider]:
+        """
+        Настроенные источники в порядке опроса.
+
+        Args:
+            essential (bool): False - пропустить источники, бюджет которых
+                сберегается для запросов без альтернативы (см. can_spend)
+            horizon (Optional[str]): Оставить только источники с этим горизонтом прогноза
+
+        Returns:
+            List[HoroscopeProvider]: Сначала с закрытым предохранителем и квотой,
+            затем по score и cost
+        """
+        configured = [
+            provider for provider in self._providers.values()
+            if provider.is_configured()
+            and (essential or provider.can_spend(False))
+            and (horizon is None or horizon in provider.horizons)
+        ]
+        return sorted(
+            configured,
+            key=lambda p: (p.breaker.state == CircuitBreaker.OPEN, not p.has_quota(), p.score(), p.cost)
+        )
+
+
+def build_default_registry() -> ProviderRegistry:
+    """Создаёт реестр со стандартными источниками: ohmanda.com и RapidAPI."""
+    registry = ProviderRegistry()
+    registry.register(OhmandaProvider())
+    registry.register(RapidApiProvider())
+    return registry
@@ -2,11 +2,20 @@
 # Сервис планировщика задач для автоматической рассылки гороскопов и бэкапов БД
 
 import asyncio
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Optional
 from aiogram import Bot
-from app.database.crud import get_subscribed_users_for_time
-from app.services.horoscope_api import HoroscopeAPI
+from app.database.crud import (
+    create_deliveries, delete_old_deliveries, get_active_notification_times, get_pending_deliveries,
+    get_pending_delivery_slots, get_subscribed_users_for_time, update_delivery_statuses
+)
+from app.services.fallback_service import FALLBACK_SOURCE, precompute_fallbacks
+from app.services.horoscope_api import (
+    HoroscopeAPI, horizon_day, next_provider_rollover, provider_day_at, provider_today
+)
+from app.services.providers import TOMORROW, WEEK
 from app.services.backup_service import BackupService
+from app.services.delivery_service import DeliveryService
 from app.utils.logger import logger
 from app.utils.message_formatter import format_horoscope_message
 from app.services.health import update_health
@@ -17,9 +26,41 @@ class SchedulerService:
 
         Отвечает за:
         - Ежедневную рассылку гороскопов подписчикам по расписанию
+          через очередь доставки в базе (с продолжением после перезапуска)
         - Автоматическое создание бэкапов базы данных
+        - Прогрев кэша гороскопов до первого слота рассылки
+        - Ночную предзагрузку гороскопов на завтра и на неделю
         - Управление жизненным циклом фоновых задач
         """
+
+    # За сколько минут до самого раннего слота прогревать кэш гороскопов
+    PREWARM_LEAD_MINUTES = 15
+
+    # Повторы прогрева: число попыток и начальная задержка (удваивается)
+    PREWARM_RETRIES = 3
+    PREWARM_BACKOFF_SECONDS = 30
+
+    # За сколько часов до смены дня у провайдера загружать прогноз на завтра
+    TOMORROW_PREFETCH_LEAD_HOURS = 3
+
+    # Как часто перечитывать расписание, пока ждём следующий слот рассылки (сек)
+    SCHEDULE_REFRESH_SECONDS = 30
+
+    # Насколько слот может опоздать (например, из-за долгого предыдущего слота);
+    # более поздние слоты пропускаются, а не отправляются с опозданием на часы
+    SLOT_MAX_LATENESS_MINUTES = 60
+
+    # Сколько дней хранить строки очереди доставки
+    DELIVERIES_KEEP_DAYS = 30
+
+    # Сколько часов после слота недоставленные сообщения ещё дорассылаются после перезапуска
+    RESUME_WINDOW_HOURS = 3
+
+    # Состояние прогрева кэша на текущий день и ночной предзагрузки (date - дата,
+    # на которую загружен прогноз). Общие для процесса, для админки (см. stats)
+    prewarm_status: Dict[str, Any] = {"date": None, "ready": False, "signs_ready": 0, "signs_total": 0, "attempts": 0}
+    tomorrow_prefetch_status: Dict[str, Any] = {"date": None, "signs_ready": 0, "signs_total": 0}
+
     def __init__(self, bot: Bot):
         """
             Инициализация планировщика.
@@ -30,8 +71,12 @@ class SchedulerService:
 
         self.bot = bot
         self.horoscope_api = HoroscopeAPI()
+        self.delivery = DeliveryService(bot)
         self.is_running = False
 
+        # Последний обработанный слот рассылки (дата и время с точностью до минуты)
+        self.last_processed_slot: Optional[datetime] = None
+
         # Инициализируем сервис бэкапов
         self.backup_service = BackupService(
             db_path="app/data/database.db",
@@ -45,8 +90,10 @@ class SchedulerService:
 
                 Создает:
                 - Бэкап БД при старте
-                - Цикл рассылки гороскопов (каждую минуту проверяет)
+                - Цикл рассылки гороскопов (спит точно до следующего слота)
                 - Цикл ежедневных бэкапов (03:00)
+                - Цикл прогрева кэша гороскопов перед первым слотом
+                - Цикл ночной предзагрузки гороскопов на завтра
                 """
         self.is_running = True
         logger.info("⏰ Scheduler started")
@@ -54,10 +101,15 @@ class SchedulerService:
         # Создаём бэкап при старте
         await self._create_backup()
 
+        # Резервные гороскопы на год вперёд (дописываются только недостающие дни)
+        self._precompute_fallbacks()
+
         # Запускаем фоновые циклы в отдельных задачах
         asyncio.create_task(self._notification_loop())
         asyncio.create_task(self._daily_backup_loop())
         asyncio.create_task(self._health_update_loop())
+        asyncio.create_task(self._prewarm_loop())
+        asyncio.create_task(self._tomorrow_prefetch_loop())
 
     async def stop(self):
         """Остановка планировщика"""
@@ -75,6 +127,13 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Ошибка при создании бэкапа: {e}")
 
+    def _precompute_fallbacks(self):
+        """Сохраняет резервные гороскопы всех знаков на год вперёд"""
+        try:
+            precompute_fallbacks(list(self.horoscope_api.signs), HoroscopeAPI.LANGUAGE, provider_today())
+        except Exception as e:
+            logger.error(f"Ошибка при подготовке резервных гороскопов: {e}")
+
     async def _daily_backup_loop(self):
         """
                 Цикл ежедневных бэкапов в 03:00 утра.
@@ -88,6 +147,7 @@ class SchedulerService:
                 # Если 03:00 утра
                 if now.hour == 3 and now.minute == 0:
                     await self._create_backup()
+                    self._cleanup_deliveries()
                     # Ждём час, чтобы не создавать много бэкапов
                     await asyncio.sleep(3600)
                 else:
@@ -97,60 +157,396 @@ class SchedulerService:
                 logger.error(f"Ошибка в daily_backup_loop: {e}")
                 await asyncio.sleep(60)
 
+    def _cleanup_deliveries(self):
+        """Удаляет строки очереди доставки старше DELIVERIES_KEEP_DAYS дней"""
+        try:
+            delete_old_deliveries((datetime.now().date() - timedelta(days=self.DELIVERIES_KEEP_DAYS)).isoformat())
+        except Exception as e:
+            logger.error(f"Ошибка при очистке очереди доставки: {e}")
+
+    def _next_slot(self, after: datetime) -> Optional[datetime]:
+        """
+        Вычисляет ближайший слот рассылки строго после after.
+
+        Args:
+            after (datetime): Последний обработанный слот
+
+        Returns:
+            Optional[datetime]: Дата и время слота или None, если подписчиков нет
+        """
+        times = get_active_notification_times()
+        if not times:
+            return None
+
+        slots = [
+            datetime.combine(after.date() + timedelta(days=offset), datetime.strptime(slot, "%H:%M").time())
+            for offset in (0, 1)
+            for slot in times
+        ]
+        return min(slot for slot in slots if slot > after)
+
     async def _notification_loop(self):
         """
                 Основной цикл рассылки гороскопов.
 
-                Каждую минуту проверяет подписчиков и отправляет гороскопы по времени уведомлений.
+                Вычисляет ближайший слот по расписанию подписок и спит точно до него.
+                Слоты обрабатываются строго по порядку после last_processed_slot:
+                если слот длился дольше минуты, следующие слоты отправляются сразу
+                после него, а не пропускаются, и ни один слот не обрабатывается дважды.
+                Слот, опоздавший больше чем на SLOT_MAX_LATENESS_MINUTES (например,
+                подписка на уже прошедшее время), пропускается. Пока подписчиков
+                нет, отметка последнего слота сдвигается к текущему времени.
+
+                Перед первым слотом дорассылаются слоты, прерванные перезапуском
+                или падением бота (сегодняшние и недавние вчерашние).
                 """
+        # Текущая минута ещё не обработана: при старте в 09:00:30 слот 09:00 будет отправлен
+        self.last_processed_slot = datetime.now().replace(second=0, microsecond=0) - timedelta(minutes=1)
+
+        try:
+            await self._resume_pending_deliveries(self.last_processed_slot)
+        except Exception as e:
+            logger.error(f"⏰ Ошибка при продолжении рассылки: {e}")
 
         while self.is_running:
             try:
-                now = datetime.now()
-                current_time = now.strftime("%H:%M")
+                slot = self._next_slot(self.last_processed_slot)
+                if slot is None:
+                    # Без подписчиков прошедшие слоты не нужны: иначе первая подписка
+                    # запустила бы все слоты с момента старта подряд
+                    self.last_processed_slot = datetime.now().replace(second=0, microsecond=0) - timedelta(minutes=1)
+                    await asyncio.sleep(self.SCHEDULE_REFRESH_SECONDS)
+                    continue
 
-                # Получаем пользователей для текущего времени
-                users = get_subscribed_users_for_time(current_time)
+                delay = (slot - datetime.now()).total_seconds()
+                if delay > 0:
+                    # Расписание могло измениться (новая подписка раньше slot) - перечитываем его
+                    await asyncio.sleep(min(delay, self.SCHEDULE_REFRESH_SECONDS))
+                    continue
 
-                if users:
-                    logger.info(f"⏰ Отправка уведомлений для {len(users)} пользователей в {current_time}")
-                    await self._send_horoscopes(users, current_time)
+                if -delay > self.SLOT_MAX_LATENESS_MINUTES * 60:
+                    logger.warning(f"⏰ Слот {slot:%Y-%m-%d %H:%M} пропущен: опоздание {-delay / 60:.0f} мин")
+                    self.last_processed_slot = slot
+                    continue
 
-                # Ждём 1 минуту перед следующей проверкой
-                await asyncio.sleep(60)
+                try:
+                    await self._process_slot(slot)
+                finally:
+                    # Слот не повторяется даже после ошибки: повтор мог бы отправить гороскоп дважды
+                    self.last_processed_slot = slot
 
             except Exception as e:
                 logger.error(f"⏰ Ошибка в notification_loop: {e}")
+                await asyncio.sleep(self.SCHEDULE_REFRESH_SECONDS)
+
+    async def _resume_pending_deliveries(self, until: datetime):
+        """
+        Дорассылает недоставленные сообщения прошедших слотов не позже until.
+
+        Строки в статусе pending остаются в очереди, если бот остановился
+        посреди рассылки; уже отправленные сообщения повторно не уходят.
+        Просматриваются вчерашний и сегодняшний дни, чтобы слот, прерванный
+        поздно вечером, не потерялся после полуночи. Сообщения слотов старше
+        RESUME_WINDOW_HOURS не отправляются и помечаются failed. Слот получает
+        гороскоп на дату провайдера в момент слота: после смены дня это
+        сохранённый вчерашний текст, а не сегодняшний.
+
+        Args:
+            until (datetime): Последний слот, который считается прошедшим
+        """
+        yesterday = until.date() - timedelta(days=1)
+
+        for slot_date, until_time in ((yesterday, "23:59"), (until.date(), until.strftime("%H:%M"))):
+            day = slot_date.isoformat()
+
+            for current_time in get_pending_delivery_slots(day, until_time):
+                users = get_pending_deliveries(day, current_time)
+                if not users:
+                    continue
+
+                slot = datetime.combine(slot_date, datetime.strptime(current_time, "%H:%M").time())
+                if until - slot > timedelta(hours=self.RESUME_WINDOW_HOURS):
+                    logger.warning(f"⏰ Рассылка {day} {current_time} устарела, не отправлена: {len(users)} пользователей")
+                    update_delivery_statuses(day, [(user["id"], "failed") for user in users])
+                    continue
+
+                logger.info(f"⏰ Продолжаем прерванную рассылку {day} {current_time}: {len(users)} пользователей")
+                await self._send_horoscopes(users, current_time, day, text_day=provider_day_at(slot))
+
+    async def _process_slot(self, slot: datetime):
+        """
+        Отправляет гороскопы подписчикам слота.
+
+        Подписчики сначала записываются в очередь доставки (deliveries), затем
+        отправляются только строки в статусе pending. Пользователь, уже
+        получивший гороскоп сегодня (например, после смены времени рассылки),
+        повторно в очередь не попадает.
+
+        Args:
+            slot (datetime): Дата и время слота
+        """
+        current_time = slot.strftime("%H:%M")
+        day = slot.date().isoformat()
+        lag = (datetime.now() - slot).total_seconds()
+        if lag >= 60:
+            logger.warning(f"⏰ Слот {current_time} обрабатывается с опозданием {lag:.0f}s")
+
+        # Получаем пользователей для времени слота и ставим их в очередь доставки
+        subscribers = get_subscribed_users_for_time(current_time)
+        if subscribers:
+            create_deliveries(day, current_time, [user["id"] for user in subscribers])
+
+        users = get_pending_deliveries(day, current_time)
+        if users:
+            logger.info(f"⏰ Отправка уведомлений для {len(users)} пользователей в {current_time}")
+            await self._send_horoscopes(users, current_time, day)
+
+    def _next_prewarm_time(self) -> Optional[datetime]:
+        """
+        Вычисляет момент следующего прогрева кэша.
+
+        Прогрев запускается за PREWARM_LEAD_MINUTES до самого раннего времени
+        рассылки, на которое есть подписчики. Если сегодня прогрева ещё не было,
+        а этот момент уже прошёл, прогрев запускается сразу.
+
+        Returns:
+            Optional[datetime]: Время прогрева или None, если подписчиков нет
+        """
+        times = get_active_notification_times()
+        if not times:
+            return None
+
+        now = datetime.now()
+        earliest = datetime.strptime(times[0], "%H:%M").time()
+        warm_at = datetime.combine(now.date(), earliest) - timedelta(minutes=self.PREWARM_LEAD_MINUTES)
+
+        if self.prewarm_status["date"] == now.date().isoformat():
+            # Сегодня уже прогревали - следующий прогрев завтра
+            warm_at += timedelta(days=1)
+
+        return warm_at
+
+    async def _prewarm_loop(self):
+        """
+        Цикл прогрева кэша гороскопов.
+
+        Раз в день до первого слота загружает и переводит гороскопы всех знаков,
+        чтобы рассылка начиналась без ожидания API и переводчика.
+        """
+        while self.is_running:
+            try:
+                warm_at = self._next_prewarm_time()
+                if warm_at is None:
+                    await asyncio.sleep(300)
+                    continue
+
+                delay = (warm_at - datetime.now()).total_seconds()
+                if delay > 0:
+                    # Спим не дольше 5 минут: расписание подписок могло измениться
+                    await asyncio.sleep(min(delay, 300))
+                    continue
+
+                await self._prewarm()
+
+            except Exception as e:
+                logger.error(f"🔥 Ошибка в prewarm_loop: {e}")
                 await asyncio.sleep(60)
 
-    async def _send_horoscopes(self, users: list, current_time: str):
-        """Отправляет гороскопы пользователям"""
-        for user in users:
+    async def _prewarm(self):
+        """
+        Прогревает кэш гороскопов всех знаков с повторами и экспоненциальной задержкой.
+
+        Повторно запрашиваются только знаки, для которых API не ответили
+        (получен локальный резервный гороскоп).
+        """
+        today = datetime.now().date().isoformat()
+        signs = list(self.horoscope_api.signs)
+        ready: set = set()
+        attempts = 0
+
+        self._record_prewarm({"date": today, "ready": False, "signs_ready": 0, "signs_total": len(signs), "attempts": 0})
+        logger.info("🔥 Прогрев кэша гороскопов...")
+
+        # Сдвигаем окно резервных гороскопов на новый день
+        self._precompute_fallbacks()
+
+        for attempt in range(1, self.PREWARM_RETRIES + 1):
+            attempts = attempt
+            pending = [sign for sign in signs if sign not in ready]
+
             try:
-                user_id = user["id"]
-                sign = user.get("sign")
-                first_name = user.get("first_name", "друг")
+                results = await self.horoscope_api.get_all_daily_horoscopes(pending)
+                ready.update(sign for sign, result in results.items() if result["source"] != FALLBACK_SOURCE)
+            except Exception as e:
+                logger.error(f"🔥 Ошибка прогрева (попытка {attempt}): {e}")
+
+            if len(ready) == len(signs):
+                break
 
-                if sign:
-                    # Получаем гороскоп
-                    horoscope_text = await self.horoscope_api.get_daily_horoscope(sign)
+            if attempt < self.PREWARM_RETRIES:
+                backoff = self.PREWARM_BACKOFF_SECONDS * 2 ** (attempt - 1)
+                logger.warning(f"🔥 Прогрето {len(ready)}/{len(signs)}, повтор через {backoff}s")
+                await asyncio.sleep(backoff)
 
-                    # Форматируем красивое сообщение
-                    message = format_horoscope_message(first_name, sign, horoscope_text, current_time)
+        self._record_prewarm({
+            "date": today,
+            "ready": len(ready) == len(signs),
+            "signs_ready": len(ready),
+            "signs_total": len(signs),
+            "attempts": attempts,
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+        })
 
-                    # Отправляем сообщение
-                    await self.bot.send_message(
-                        chat_id=user_id,
-                        text=message
-                    )
+        if self.prewarm_status["ready"]:
+            logger.success(f"🔥 Кэш гороскопов прогрет ({attempts} попыт.)")
+        else:
+            logger.warning(f"🔥 Кэш прогрет частично: {len(ready)}/{len(signs)} знаков")
 
-                    logger.info(f"⏰ Гороскоп отправлен {user_id} ({sign})")
+    @classmethod
+    def _record_prewarm(cls, status: Dict[str, Any]) -> None:
+        """Сохраняет состояние прогрева (общее для процесса)."""
+        cls.prewarm_status = status
 
-                    # Небольшая пауза между отправками
-                    await asyncio.sleep(0.3)
+    @classmethod
+    def _record_tomorrow_prefetch(cls, status: Dict[str, Any]) -> None:
+        """Сохраняет состояние ночной предзагрузки (общее для процесса)."""
+        cls.tomorrow_prefetch_status = status
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        """
+        Готовность кэша гороскопов для админки.
+
+        Returns:
+            Dict[str, Any]: Состояние прогрева на сегодня ("prewarm") и ночной
+            предзагрузки на завтра ("tomorrow_prefetch")
+        """
+        return {"prewarm": dict(cls.prewarm_status), "tomorrow_prefetch": dict(cls.tomorrow_prefetch_status)}
+
+    async def _tomorrow_prefetch_loop(self):
+        """
+        Цикл ночной предзагрузки.
+
+        За TOMORROW_PREFETCH_LEAD_HOURS до смены дня у провайдера загружает и
+        переводит гороскопы на завтра. Они сохраняются под завтрашней датой,
+        поэтому после полуночи сегодняшние гороскопы берутся из кэша и БД,
+        а не запрашиваются у API всеми пользователями разом.
+        """
+        while self.is_running:
+            try:
+                tomorrow = horizon_day(TOMORROW)
+                until_rollover = next_provider_rollover() - datetime.now().timestamp()
+
+                if self.tomorrow_prefetch_status["date"] == tomorrow:
+                    # На завтра уже загружено - ждём смены дня
+                    await asyncio.sleep(min(max(until_rollover, 1), 300))
+                    continue
+
+                delay = until_rollover - self.TOMORROW_PREFETCH_LEAD_HOURS * 3600
+                if delay > 0:
+                    await asyncio.sleep(min(delay, 300))
+                    continue
+
+                await self._prefetch_tomorrow(tomorrow)
 
             except Exception as e:
-                logger.error(f"⏰ Ошибка отправки пользователю {user.get('id')}: {e}")
+                logger.error(f"🌙 Ошибка в tomorrow_prefetch_loop: {e}")
+                await asyncio.sleep(60)
+
+    async def _prefetch_tomorrow(self, tomorrow: str):
+        """
+        Загружает гороскопы всех знаков на завтра и (кроме воскресенья) на текущую неделю.
+
+        Args:
+            tomorrow (str): Завтрашняя дата провайдера в формате ISO
+        """
+        logger.info(f"🌙 Предзагрузка гороскопов на {tomorrow}...")
+
+        results = await self.horoscope_api.get_all_daily_horoscopes(horizon=TOMORROW)
+        ready = sum(1 for result in results.values() if result["source"] != FALLBACK_SOURCE)
+        self._record_tomorrow_prefetch({"date": tomorrow, "signs_ready": ready, "signs_total": len(results)})
+
+        # В воскресенье ночью неделя заканчивается - её прогноз уже не нужен
+        if provider_today().weekday() != 6:
+            await self.horoscope_api.get_all_daily_horoscopes(horizon=WEEK)
+
+        logger.info(f"🌙 Гороскопы на завтра загружены: {ready}/{len(results)} знаков")
+
+    async def _fetch_horoscopes_by_sign(self, users: list, text_day: Optional[str] = None) -> Dict[str, str]:
+        """
+        Получает гороскоп один раз для каждого знака, встречающегося среди подписчиков.
+
+        Знаков всего 12, поэтому число запросов к API и переводчику не зависит
+        от количества подписчиков в слоте. Все знаки загружаются одновременно
+        и переводятся одним пакетом.
+
+        Args:
+            users (list): Подписчики текущего слота
+            text_day (Optional[str]): Дата провайдера, на которую нужен гороскоп
+                (для дорассылки прошедших слотов; по умолчанию сегодня)
+
+        Returns:
+            Dict[str, str]: Текст гороскопа для каждого знака (ключ - знак в нижнем регистре)
+        """
+        signs = {user["sign"].lower() for user in users if user.get("sign")}
+        if not signs:
+            return {}
+
+        if text_day and text_day != horizon_day():
+            return self.horoscope_api.get_stored_horoscopes(list(signs), text_day)
+
+        try:
+            results = await self.horoscope_api.get_all_daily_horoscopes(list(signs))
+        except Exception as e:
+            logger.error(f"⏰ Ошибка получения гороскопов: {e}")
+            return {}
+
+        horoscopes = {sign: result["text"] for sign, result in results.items()}
+        logger.info(f"⏰ Получено гороскопов: {len(horoscopes)} из {len(signs)} знаков")
+        return horoscopes
+
+    async def _send_horoscopes(self, users: list, current_time: str, day: str, text_day: Optional[str] = None):
+        """
+        Отправляет гороскопы пользователям.
+
+        Сообщения отправляются параллельно пулом DeliveryService с общим
+        лимитом частоты Telegram; отчёт о скорости и длительности слота
+        сохраняется в delivery.last_report. Итоги доставки записываются
+        в очередь deliveries пачками по ходу рассылки; пользователи, для
+        знака которых не нашлось текста, сразу помечаются failed.
+        """
+        # Гороскопы запрашиваются один раз на знак, а затем раздаются всем подписчикам
+        horoscopes = await self._fetch_horoscopes_by_sign(users, text_day)
+
+        messages = []
+        skipped = []
+        for user in users:
+            user_id = user["id"]
+            sign = user.get("sign")
+            first_name = user.get("first_name", "друг")
+
+            if not sign:
+                skipped.append((user_id, "failed"))
+                continue
+
+            horoscope_text = horoscopes.get(sign.lower())
+            if not horoscope_text:
+                logger.warning(f"⏰ Нет гороскопа для {sign}, пропускаем {user_id}")
+                skipped.append((user_id, "failed"))
+                continue
+
+            # Форматируем красивое сообщение
+            messages.append((user_id, format_horoscope_message(first_name, sign, horoscope_text, current_time)))
+
+        # Иначе строка осталась бы pending до перезапуска бота
+        update_delivery_statuses(day, skipped)
+
+        if messages:
+            await self.delivery.send_all(
+                messages,
+                label=current_time,
+                on_results=lambda results: update_delivery_statuses(day, results)
+            )
 
     async def _health_update_loop(self):
         """
@@ -0,0 +1,252 @@
+"""
+Локальный стенд-сервер источников гороскопов
+=============================================
+Имитирует ответы ohmanda.com и horoscope-app-api (RapidAPI), а также
+переводчика, с настраиваемыми задержками, долей ошибок и ограничением частоты
+запросов. Нужен, чтобы нагружать кэш, хеджирование и предохранители без
+обращений к настоящим API и к Google Translate.
+
+Запуск:
+    python -m app.services.stub_provider_server --port 8080 --seed 42 \\
+        --latency lognormal:0.3:0.6 --rapidapi-latency fixed:0.5 \\
+        --ohmanda-error-rate 0.1 --rapidapi-rate-limit 5 --translator-latency fixed:0.1
+
+Бот переключается на стенд (источники и переводчик) переменной окружения:
+    HOROSCOPE_PROVIDER_BASE_URL=http://127.0.0.1:8080
+
+Задержка задаётся как распределение (в секундах):
+    fixed:0.2            - всегда 0.2
+    uniform:0.1:0.5      - равномерно от 0.1 до 0.5
+    lognormal:0.3:0.6    - логнормально с медианой 0.3 и sigma 0.6 (длинный хвост)
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import re
+import time
+from datetime import date
+from typing import Any, Callable, Dict
+from aiohttp import web
+from app.utils.logger import logger
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Разбирает описание распределения задержки.
+
+    Args:
+        spec (str): fixed:VALUE, uniform:LOW:HIGH или lognormal:MEDIAN:SIGMA
+        rng (random.Random): Генератор случайных чисел (для воспроизводимости)
+
+    Returns:
+        Callable[[], float]: Функция, возвращающая очередную задержку в секундах
+
+    Raises:
+        ValueError: Неизвестное распределение или неверные параметры
+    """
+    kind, *params = spec.split(":")
+    values = [float(param) for param in params]
+
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda: rng.lognormvariate(mu, values[1])
+
+    raise ValueError(f"Неизвестное распределение задержки: {spec}")
+
+
+class StubProfile:
+    """
+    Поведение одного имитируемого источника.
+
+    - latency: функция задержки ответа
+    - error_rate: доля ответов HTTP 500
+    - hang_rate: доля запросов, которые «зависают» на hang_seconds (для проверки таймаутов)
+    - rate_limit: запросов в секунду (0 - без ограничения), сверх лимита - HTTP 429
+    """
+
+    def __init__(self, name: str, latency: Callable[[], float], error_rate: float, hang_rate: float,
+                 hang_seconds: float, rate_limit: float, rng: random.Random):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.rate_limit = rate_limit
+        self.rng = rng
+
+        # Корзина токенов для rate_limit (ёмкость - одна секунда запросов)
+        self._tokens = rate_limit
+        self._refilled_at = time.monotonic()
+
+        self.counters: Dict[str, int] = {"requests": 0, "ok": 0, "errors": 0, "limited": 0, "hung": 0}
+
+    def _take_token(self) -> bool:
+        """Забирает токен из корзины; False - лимит частоты превышен."""
+        if not self.rate_limit:
+            return True
+
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled_at) * self.rate_limit)
+        self._refilled_at = now
+
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def respond(self, payload: Dict[str, Any]) -> web.Response:
+        """
+        Отвечает payload с задержкой, ошибкой или отказом по лимиту согласно профилю.
+
+        Args:
+            payload (Dict[str, Any]): Тело успешного ответа
+        """
+        self.counters["requests"] += 1
+
+        if not self._take_token():
+            self.counters["limited"] += 1
+            return web.json_response({"message": "Too many requests"}, status=429)
+
+        roll = self.rng.random()
+        if roll < self.hang_rate:
+            self.counters["hung"] += 1
+            await asyncio.sleep(self.hang_seconds)
+        else:
+            await asyncio.sleep(max(self.latency(), 0.0))
+
+        if self.rng.random() < self.error_rate:
+            self.counters["errors"] += 1
+            return web.json_response({"message": "Internal server error"}, status=500)
+
+        self.counters["ok"] += 1
+        return web.json_response(payload)
+
+
+def make_text(sign: str, horizon: str) -> str:
+    """Детерминированный англоязычный текст для знака (стенд не ходит в переводчик сам)."""
+    return f"Stub {horizon} horoscope for {sign.capitalize()} on {date.today().isoformat()}."
+
+
+# Разделитель пакетного перевода (см. SimpleTranslator.BATCH_DELIMITER) сохраняется как есть
+BATCH_SEPARATOR = re.compile(r"(\s*#{3}\s*)")
+
+
+def make_translation(text: str, target: str) -> str:
+    """Детерминированный «перевод»: каждая часть пакета получает префикс языка перевода."""
+    return "".join(
+        part if not part.strip() or BATCH_SEPARATOR.fullmatch(part) else f"[{target}] {part}"
+        for part in BATCH_SEPARATOR.split(text)
+    )
+
+
+def create_app(profiles: Dict[str, StubProfile]) -> web.Application:
+    """
+    Создаёт приложение с маршрутами, повторяющими формат настоящих API.
+
+    - GET /api/horoscope/{sign}/ - как ohmanda.com
+    - GET /api/v1/get-horoscope/daily?sign=Aries&day=TODAY - как horoscope-app-api
+    - GET /api/v1/get-horoscope/weekly?sign=Aries - как horoscope-app-api
+    - POST /translate {"text", "source", "target"} - переводчик для SimpleTranslator
+    - GET /stats - счётчики стенда
+    """
+
+    async def ohmanda(request: web.Request) -> web.Response:
+        sign = request.match_info["sign"].lower()
+        return await profiles["ohmanda"].respond({
+            "sign": sign,
+            "date": date.today().isoformat(),
+            "horoscope": make_text(sign, "daily"),
+        })
+
+    async def rapidapi_daily(request: web.Request) -> web.Response:
+        sign = request.query.get("sign", "")
+        day = request.query.get("day", "TODAY")
+        return await profiles["rapidapi"].respond({
+            "data": {"date": date.today().isoformat(), "horoscope_data": make_text(sign, day.lower())},
+            "status": 200,
+            "success": True,
+        })
+
+    async def rapidapi_weekly(request: web.Request) -> web.Response:
+        sign = request.query.get("sign", "")
+        return await profiles["rapidapi"].respond({
+            "data": {"week": date.today().strftime("%G-W%V"), "horoscope_data": make_text(sign, "weekly")},
+            "status": 200,
+            "success": True,
+        })
+
+    async def translate(request: web.Request) -> web.Response:
+        body = await request.json()
+        return await profiles["translator"].respond({
+            "translated": make_translation(body.get("text", ""), body.get("target", "ru")),
+        })
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({name: profile.counters for name, profile in profiles.items()})
+
+    app = web.Application()
+    app.router.add_get("/api/horoscope/{sign}/", ohmanda)
+    app.router.add_get("/api/v1/get-horoscope/daily", rapidapi_daily)
+    app.router.add_get("/api/v1/get-horoscope/weekly", rapidapi_weekly)
+    app.router.add_post("/translate", translate)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+# Имитируемые сервисы: у каждого свой профиль и свои параметры --<имя>-*
+STUB_SERVICES = ("ohmanda", "rapidapi", "translator")
+
+
+def build_profiles(args: argparse.Namespace) -> Dict[str, StubProfile]:
+    """Собирает профили источников: общие параметры с переопределениями для каждого."""
+    rng = random.Random(args.seed)
+    profiles = {}
+
+    for name in STUB_SERVICES:
+        def option(key: str) -> Any:
+            value = getattr(args, f"{name}_{key}")
+            return value if value is not None else getattr(args, key)
+
+        profiles[name] = StubProfile(
+            name=name,
+            latency=parse_latency(option("latency"), rng),
+            error_rate=option("error_rate"),
+            hang_rate=option("hang_rate"),
+            hang_seconds=args.hang_seconds,
+            rate_limit=option("rate_limit"),
+            rng=rng,
+        )
+
+    return profiles
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Стенд-сервер источников гороскопов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--seed", type=int, default=None, help="Зерно генератора (для воспроизводимых прогонов)")
+    parser.add_argument("--latency", default="lognormal:0.2:0.5", help="Распределение задержки")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Доля зависающих запросов")
+    parser.add_argument("--hang-seconds", type=float, default=30.0, help="Сколько длится зависание")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Запросов в секунду (0 - без лимита)")
+
+    for name in STUB_SERVICES:
+        parser.add_argument(f"--{name}-latency", default=None)
+        parser.add_argument(f"--{name}-error-rate", type=float, default=None)
+        parser.add_argument(f"--{name}-hang-rate", type=float, default=None)
+        parser.add_argument(f"--{name}-rate-limit", type=float, default=None)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    logger.info(f"[STUB] Стенд источников гороскопов: http://{args.host}:{args.port}")
+    web.run_app(create_app(build_profiles(args)), host=args.host, port=args.port, print=None)
@@ -1,6 +1,20 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from deep_translator import GoogleTranslator
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from app.database.crud import get_translation, save_translation, delete_old_translations
+from app.services.providers import stub_base_url
 from app.utils.logger import logger
+from app.utils.metrics import stage_metrics
 
 class TranslatorService:
     """
@@ -36,44 +50,323 @@ class TranslatorService:
             print(f"[TranslatorService] Error: {e}")
             return None
 
+class TranslationMemory:
+    """
+    Память переводов: LRU-кэш в памяти поверх таблицы translations в SQLite.
+
+    Ключ - (sha256 исходного текста, язык источника, язык перевода), поэтому
+    один и тот же текст переводится по сети только один раз.
+    """
+
+    MAX_MEMORY_ITEMS = int(os.getenv("TRANSLATION_MEMORY_SIZE", "1000"))
+    DISK_TTL_DAYS = int(os.getenv("TRANSLATION_DISK_TTL_DAYS", "30"))
+
+    # Как часто (в секундах) удалять устаревшие переводы с диска
+    DISK_PRUNE_INTERVAL = 3600
+
+    def __init__(self):
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._last_prune = 0.0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, source: str, target: str) -> Tuple[str, str, str]:
+        """Строит ключ памяти переводов по хэшу исходного текста."""
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return text_hash, source, target
+
+    def get(self, text: str, source: str, target: str) -> Optional[str]:
+        """
+        Ищет перевод сначала в памяти, затем на диске.
+
+        Returns:
+            Optional[str]: Сохранённый перевод или None
+        """
+        key = self.make_key(text, source, target)
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+
+        translated = get_translation(*key)
+        if translated:
+            self.disk_hits += 1
+            self._remember(key, translated)
+            return translated
+
+        self.misses += 1
+        return None
+
+    def put(self, text: str, source: str, target: str, translated: str) -> None:
+        """Сохраняет перевод в память и на диск."""
+        key = self.make_key(text, source, target)
+        self._remember(key, translated)
+        save_translation(*key, translated)
+        self._prune_disk()
+
+    def _remember(self, key: Tuple[str, str, str], translated: str) -> None:
+        """Кладёт перевод в LRU и вытесняет самые старые записи при переполнении."""
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+
+        while len(self._memory) > self.MAX_MEMORY_ITEMS:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self) -> None:
+        """Не чаще раза в DISK_PRUNE_INTERVAL удаляет с диска переводы старше DISK_TTL_DAYS."""
+        now = time.time()
+        if now - self._last_prune < self.DISK_PRUNE_INTERVAL:
+            return
+
+        self._last_prune = now
+        older_than = (datetime.now() - timedelta(days=self.DISK_TTL_DAYS)).isoformat()
+        self.evictions += delete_old_translations(older_than)
+
+    def stats(self) -> Dict[str, float]:
+        """Статистика памяти переводов: попадания по уровням, промахи, вытеснения и доля попаданий."""
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._memory),
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+        }
+
+
+# Общая для процесса память переводов
+translation_memory = TranslationMemory()
+
+
 class SimpleTranslator:
-    async def translate_text(self, text: str) -> str:
+    """
+    Асинхронная обёртка над синхронным GoogleTranslator.
+
+    Перевод выполняется в отдельном ограниченном пуле потоков с таймаутом,
+    поэтому медленный переводчик не блокирует цикл событий бота.
+    Готовые переводы берутся из памяти переводов (TranslationMemory).
+    Несколько текстов можно перевести одним запросом (translate_batch).
+
+    Если задан HOROSCOPE_PROVIDER_BASE_URL, вместо Google Translate используется
+    переводчик стенд-сервера (POST /translate), поэтому прогоны на стенде
+    полностью офлайн и воспроизводимы.
+    """
+
+    SOURCE_LANG = "en"
+    TARGET_LANG = "ru"
+
+    # Пакетный перевод: тексты склеиваются разделителем в запросы не длиннее лимита Google
+    BATCH_MAX_CHARS = 4500
+    BATCH_DELIMITER = "\n\n###\n\n"
+    BATCH_SPLIT_PATTERN = re.compile(r"\s*#{3}\s*")
+
+    # Размер пула потоков и таймаут одного перевода (в секундах)
+    MAX_WORKERS = int(os.getenv("TRANSLATOR_MAX_WORKERS", "4"))
+    TIMEOUT = float(os.getenv("TRANSLATOR_TIMEOUT", "10"))
+
+    # Общий для всех экземпляров пул потоков
+    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="translator")
+
+    # Счётчики: задачи в пуле (ожидают + выполняются), выполняются сейчас, таймауты
+    _submitted = 0
+    _running = 0
+    _timeouts = 0
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.memory = translation_memory
+
+    async def translate_text(self, text: str) -> Optional[str]:
+        """
+        Переводит текст (сначала ищет его в памяти переводов).
+
+        Returns:
+            Optional[str]: Перевод или None, если переводчик не ответил или вернул пустой текст
+        """
         if not text:
             return ""
 
+        cached = self.memory.get(text, self.SOURCE_LANG, self.TARGET_LANG)
+        if cached:
+            logger.debug("[TRANSLATOR] Translation memory hit")
+            return cached
+
         try:
-            translator = GoogleTranslator(source="en", target="ru")
-            result = translator.translate(text)
+            result = await self._translate_in_pool(text)
 
+            if not result:
+                logger.error("[TRANSLATOR] Empty translation")
+                return None
+
+            self.memory.put(text, self.SOURCE_LANG, self.TARGET_LANG, result)
             logger.debug("[TRANSLATOR] Translation OK")
             return result
 
+        except asyncio.TimeoutError:
+            logger.error(f"[TRANSLATOR] Timeout after {self.TIMEOUT}s")
+            return None
+
         except Exception as e:
             logger.error(f"[TRANSLATOR] Error: {e}")
-            return text
-
-
-
-#
-#
-#
-# # Перевод текста с английского на русский с использованием deep-translator
-#
-# import asyncio
-# from deep_translator import GoogleTranslator
-#
-# class SimpleTranslator:
-#     def __init__(self):
-#         """ Инициализация переводчика с английского на русский. """
-#         self.translator = GoogleTranslator(source='en', target='ru')
-#
-#     async def translate_text(self, text):
-#         """
-#                 Асинхронная обертка для синхронной библиотеки перевода.
-#                 Запускает перевод в отдельном потоке, чтобы бот не «зависал».
-#                 """
-#         loop = asyncio.get_event_loop()
-#         try:
-#             return await loop.run_in_executor(None, self.translator.translate, text)
-#         except Exception:
-#             return text # В случае ошибки возвращаем оригинал
\ No newline at end of file
+            return None
+
+    async def translate_batch(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Переводит список текстов минимальным числом запросов к переводчику.
+
+        Тексты из памяти переводов не отправляются. Остальные склеиваются
+        через BATCH_DELIMITER в куски до BATCH_MAX_CHARS символов. Если после
+        перевода кусок не делится на то же число частей, его тексты
+        переводятся по одному.
+
+        Args:
+            texts (List[str]): Исходные тексты
+
+        Returns:
+            List[Optional[str]]: Переводы в том же порядке (None для непереведённых текстов)
+        """
+        translated: Dict[str, Optional[str]] = {}
+        pending: List[str] = []
+
+        for text in texts:
+            if not text or text in translated or text in pending:
+                continue
+
+            cached = self.memory.get(text, self.SOURCE_LANG, self.TARGET_LANG)
+            if cached:
+                translated[text] = cached
+            else:
+                pending.append(text)
+
+        for chunk in self._make_chunks(pending):
+            translated.update(await self._translate_chunk(chunk))
+
+        logger.debug(f"[TRANSLATOR] Batch OK: {len(texts)} texts, {len(pending)} sent")
+        return [translated.get(text) if text else "" for text in texts]
+
+    def _make_chunks(self, texts: List[str]) -> List[List[str]]:
+        """Группирует тексты в куски, которые после склейки укладываются в BATCH_MAX_CHARS."""
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_len = 0
+
+        for text in texts:
+            added_len = len(text) + (len(self.BATCH_DELIMITER) if current else 0)
+
+            if current and current_len + added_len > self.BATCH_MAX_CHARS:
+                chunks.append(current)
+                current, current_len = [], 0
+                added_len = len(text)
+
+            current.append(text)
+            current_len += added_len
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _translate_chunk(self, chunk: List[str]) -> Dict[str, Optional[str]]:
+        """Переводит один кусок пакета и раскладывает результат обратно по текстам."""
+        if len(chunk) == 1:
+            return {chunk[0]: await self.translate_text(chunk[0])}
+
+        try:
+            result = await self._translate_in_pool(self.BATCH_DELIMITER.join(chunk))
+            parts = [part.strip() for part in self.BATCH_SPLIT_PATTERN.split(result or "")]
+            parts = [part for part in parts if part]
+        except asyncio.TimeoutError:
+            logger.error(f"[TRANSLATOR] Batch timeout after {self.TIMEOUT}s")
+            parts = []
+        except Exception as e:
+            logger.error(f"[TRANSLATOR] Batch error: {e}")
+            parts = []
+
+        if len(parts) != len(chunk):
+            # Разделитель потерялся при переводе - безопасно переводим по одному
+            logger.warning(f"[TRANSLATOR] Batch split mismatch ({len(parts)}/{len(chunk)}), translating one by one")
+            return {text: await self.translate_text(text) for text in chunk}
+
+        for text, part in zip(chunk, parts):
+            self.memory.put(text, self.SOURCE_LANG, self.TARGET_LANG, part)
+        return dict(zip(chunk, parts))
+
+    async def _translate_in_pool(self, text: str) -> str:
+        """
+        Выполняет синхронный перевод в пуле потоков с таймаутом.
+
+        Raises:
+            asyncio.TimeoutError: Перевод не уложился в TIMEOUT
+        """
+        # Задача считается в очереди, пока поток пула её не завершит (даже после таймаута)
+        self._change_counter("_submitted", 1)
+        job = self._executor.submit(self._translate_sync, text)
+        job.add_done_callback(lambda _: self._change_counter("_submitted", -1))
+
+        try:
+            # Этап translate включает ожидание свободного потока пула
+            with stage_metrics.timer("translate"):
+                return await asyncio.wait_for(asyncio.wrap_future(job), timeout=self.TIMEOUT)
+        except asyncio.TimeoutError:
+            # Если перевод ещё не начался - убираем его из очереди
+            job.cancel()
+            self._change_counter("_timeouts", 1)
+            raise
+
+    @classmethod
+    def _translate_sync(cls, text: str) -> str:
+        """Синхронный перевод (выполняется в потоке пула)."""
+        cls._change_counter("_running", 1)
+        try:
+            base = stub_base_url()
+            if base:
+                return cls._translate_stub(base, text)
+
+            translator = GoogleTranslator(source=cls.SOURCE_LANG, target=cls.TARGET_LANG)
+            return translator.translate(text)
+        finally:
+            cls._change_counter("_running", -1)
+
+    @classmethod
+    def _translate_stub(cls, base: str, text: str) -> str:
+        """
+        Перевод через стенд-сервер (app/services/stub_provider_server.py).
+
+        Raises:
+            urllib.error.URLError: Стенд недоступен или ответил ошибкой (429, 500)
+        """
+        payload = json.dumps({"text": text, "source": cls.SOURCE_LANG, "target": cls.TARGET_LANG}).encode("utf-8")
+        request = urllib.request.Request(
+            f"{base}/translate", data=payload, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=cls.TIMEOUT) as response:
+            return json.loads(response.read().decode("utf-8"))["translated"]
+
+    @classmethod
+    def _change_counter(cls, name: str, delta: int) -> None:
+        """Потокобезопасно изменяет счётчик класса."""
+        with cls._lock:
+            setattr(cls, name, getattr(cls, name) + delta)
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        """
+        Статистика пула перевода.
+
+        Returns:
+            Dict[str, int]: Размер пула, глубина очереди (ожидают свободный поток),
+            выполняются сейчас и количество таймаутов
+        """
+        with cls._lock:
+            return {
+                "workers": cls.MAX_WORKERS,
+                "queue_depth": max(cls._submitted - cls._running, 0),
+                "running": cls._running,
+                "timeouts": cls._timeouts,
+            }
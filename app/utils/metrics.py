@@ -0,0 +1,159 @@
+# app/utils/metrics.py
+# Простые внутрипроцессные метрики (задержки внешних API и т.п.)
+
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+
+class RollingLatency:
+    """
+    Скользящее окно последних замеров задержки (в секундах).
+
+    Используется для расчёта перцентилей задержки внешних API.
+    """
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        """Добавляет замер в окно (самые старые замеры вытесняются)."""
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Возвращает перцентиль задержки по текущему окну.
+
+        Args:
+            p (float): Перцентиль от 0 до 100
+
+        Returns:
+            Optional[float]: Значение перцентиля или None, если замеров нет
+        """
+        if not self._samples:
+            return None
+
+        ordered = sorted(self._samples)
+        index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Краткая сводка: количество замеров, p50, p95 и p99."""
+        return {
+            "count": len(self._samples),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class Histogram:
+    """
+    Гистограмма задержек с фиксированными границами корзин (в секундах).
+
+    В отличие от RollingLatency хранит не замеры, а счётчики по корзинам,
+    поэтому накапливается за всё время работы процесса без роста памяти.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Добавляет замер в соответствующую корзину."""
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Оценивает перцентиль по корзинам (верхняя граница корзины, не больше max).
+
+        Args:
+            p (float): Перцентиль от 0 до 100
+
+        Returns:
+            Optional[float]: Оценка сверху или None, если замеров нет
+        """
+        if not self.count:
+            return None
+
+        rank = p / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                # Верхняя граница корзины, но не больше наблюдавшегося максимума
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """Краткая сводка: количество, среднее, p50, p95, p99 и максимум."""
+        if not self.count:
+            return {"count": 0, "avg": None, "p50": None, "p95": None, "p99": None, "max": None}
+
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 4),
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "p99": round(self.percentile(99), 4),
+            "max": round(self.max, 4),
+        }
+
+
+class StageMetrics:
+    """
+    Гистограммы задержек по этапам обработки и счётчики исходов.
+
+    Этапы: dns, connect, response, decode, translate, format, total.
+    Исходы: cache, stale, primary, backup, fallback, error.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Histogram] = {}
+        self._outcomes: Dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Добавляет замер этапа."""
+        self._stages.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Замеряет время выполнения блока как этап stage (в том числе при исключении)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def count(self, outcome: str) -> None:
+        """Увеличивает счётчик исхода."""
+        self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Сводки по этапам и счётчики исходов."""
+        return {
+            "stages": {stage: histogram.summary() for stage, histogram in self._stages.items()},
+            "outcomes": dict(self._outcomes),
+        }
+
+    def reset(self) -> None:
+        """Сбрасывает все гистограммы и счётчики."""
+        self._stages.clear()
+        self._outcomes.clear()
+
+
+# Общие для процесса метрики этапов получения гороскопа
+stage_metrics = StageMetrics()
@@ -9,6 +9,10 @@ import asyncio
 import os
 from dotenv import load_dotenv
 
+# Загружаем переменные окружения из файла .env до импорта модулей приложения:
+# настройки (бюджеты, таймауты, рассылка) читаются при импорте
+load_dotenv()
+
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.types import BotCommand
@@ -16,9 +20,7 @@ from aiogram.types import BotCommand
 from app.handlers import routers  # Список всех роутеров (обработчиков сообщений)
 from app.utils.logger import logger  # Кастомный логгер с цветным выводом
 from app.services.scheduler_service import SchedulerService  # Сервис планировщика задач
-
-# Загружаем переменные окружения из файла .env
-load_dotenv()
+from app.services.horoscope_api import HoroscopeAPI  # Сервис API гороскопов (общая HTTP-сессия)
 
 print(f"DEBUG: BOT_TOKEN exists: {'✅' if os.getenv('BOT_TOKEN') else '❌'}")
 print(f"DEBUG: ASTROLOGY_API_KEY exists: {'✅' if os.getenv('ASTROLOGY_API_KEY') else '❌'}")
@@ -69,12 +71,16 @@ async def main() -> None:
         Обработчик запуска - выполняется при старте бота.
 
         Выполняет:
+        - Открывает общую HTTP-сессию для API гороскопов
         - Устанавливает команды бота для меню Telegram
         - Запускает планировщик ежедневных уведомлений
         - Логирует успешный запуск
         """
         logger.success("🤖 Бот успешно запущен")
 
+        # Открываем общую HTTP-сессию с пулом соединений для API гороскопов
+        await HoroscopeAPI.start_session()
+
         # Устанавливаем команды бота для меню Telegram (/help, /start и т.д.)
         await bot.set_my_commands([
             BotCommand(command="start", description="Запустить бота"),
@@ -93,10 +99,12 @@ async def main() -> None:
 
         Выполняет:
         - Корректно останавливает планировщик
+        - Закрывает общую HTTP-сессию API гороскопов
         - Логирует событие остановки
         """
         logger.warning("🛑 Бот останавливается...")
         await scheduler.stop()
+        await HoroscopeAPI.close_session()
 
     # Запускаем polling для получения обновлений от Telegram
     await dp.start_polling(bot)